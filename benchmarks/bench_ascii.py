@@ -0,0 +1,43 @@
+"""Time checking that the contents of a package file are ascii.
+
+all_ascii used to test the bytes one at a time in a Python loop.  The loop
+is timed against all_ascii on growing runs of ascii paths.
+
+Usage: python benchmarks/bench_ascii.py [number of lines]
+"""
+import sys
+import time
+
+from conda_verify.utilities import all_ascii
+
+
+LINE = b"lib/python3.8/site-packages/package/module.py\r\n"
+
+
+def byte_by_byte(data, allow_CR=False):
+    newline = [10, 13] if allow_CR else [10]
+    for n in bytearray(data):
+        if not (n in newline or 32 <= n < 127):
+            return False
+    return True
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def main(lines=1 << 17):
+    count = 1 << 10
+    while count <= lines:
+        data = LINE * count
+        for name, function in (("byte by byte", byte_by_byte), ("all_ascii", all_ascii)):
+            seconds, result = timed(function, data, True)
+            print("{:>14} {:>9} bytes: {:8.4f} s".format(name, len(data), seconds))
+            assert result
+        count *= 4
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
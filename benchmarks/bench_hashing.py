@@ -0,0 +1,46 @@
+"""Compare the throughput of sha256_checksum with a plain read loop.
+
+Usage: python benchmarks/bench_hashing.py [size in MiB]
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from conda_verify.checks import sha256_checksum
+
+
+def read_loop_checksum(fd, buffersize=65536):
+    hash_impl = hashlib.sha256()
+    for block in iter(lambda: fd.read(buffersize), b""):
+        hash_impl.update(block)
+    return hash_impl.hexdigest()
+
+
+def best_of(checksum, path, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        with open(path, "rb") as fd:
+            start = time.time()
+            digest = checksum(fd)
+            timings.append(time.time() - start)
+    return min(timings), digest
+
+
+def main(size_mb=256):
+    fd, path = tempfile.mkstemp(suffix=".so")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1 << 20))
+        for name, checksum in (("read loop", read_loop_checksum),
+                               ("sha256_checksum", sha256_checksum)):
+            seconds, digest = best_of(checksum, path)
+            print("{:>16}: {:8.1f} MiB/s  {}".format(name, size_mb / seconds, digest))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,75 @@
+"""Time check_pyc_files on a Python 2 package with many .py files.
+
+check_pyc_files used to look up the .pyc of every .py file in the list of
+package paths, which takes quadratic time.  The list lookup is timed on
+growing subsets of the paths, and check_pyc_files on all of them.
+
+Usage: python benchmarks/bench_path_index.py [number of .py files]
+"""
+import io
+import json
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+
+from conda_verify.checks import MEMBERS, CondaPackageCheck
+
+
+SITE_PACKAGES = os.path.join("lib", "python2.7", "site-packages")
+
+
+def make_package(directory, count):
+    paths = []
+    for i in range(count):
+        module = os.path.join(SITE_PACKAGES, "pkg{}".format(i // 1000), "m{}.py".format(i))
+        paths.extend([module, module + "c"])
+    index = {"name": "bench", "version": "1.0", "build": "py27_0", "platform": "linux"}
+    package = os.path.join(directory, "bench-1.0-py27_0.tar")
+    with tarfile.open(package, "w") as tar:
+        for name, contents in (("info/index.json", json.dumps(index).encode()),
+                               ("info/files", "\n".join(paths).encode())):
+            member = tarfile.TarInfo(name)
+            member.size = len(contents)
+            tar.addfile(member, io.BytesIO(contents))
+        for path in paths:
+            tar.addfile(tarfile.TarInfo(path))
+    return package
+
+
+def list_lookup(paths):
+    for filepath in paths:
+        if "site-packages" in filepath:
+            if filepath.endswith(".py") and (filepath + "c") not in paths:
+                return filepath
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def main(count=100000):
+    directory = tempfile.mkdtemp()
+    try:
+        package_check = CondaPackageCheck(make_package(directory, count), inputs=[MEMBERS])
+        build_seconds, index = timed(lambda: package_check.paths)
+        paths = list(index)
+        size = 1000
+        while size <= min(len(paths), 16000):
+            seconds, result = timed(list_lookup, paths[:size])
+            print("{:>18} {:>7} paths: {:8.3f} s".format("list lookup", size, seconds))
+            size *= 2
+        print("{:>18} {:>7} paths: {:8.3f} s".format("build PathIndex", len(paths), build_seconds))
+        seconds, result = timed(package_check.check_pyc_files)
+        print("{:>18} {:>7} paths: {:8.3f} s".format("check_pyc_files", len(paths), seconds))
+        assert result is None
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
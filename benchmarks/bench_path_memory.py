@@ -0,0 +1,89 @@
+"""Report the peak memory used to verify a package with many files.
+
+A package with the given number of empty files is verified in a fresh
+process, streamed and extracted, and the growth of its peak RSS over the
+RSS it had before verifying the package is reported.
+
+Usage: python benchmarks/bench_path_memory.py [number of files]
+"""
+import hashlib
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+
+SITE_PACKAGES = os.path.join("lib", "python3.8", "site-packages")
+
+
+def make_package(directory, count):
+    paths = [
+        os.path.join(
+            SITE_PACKAGES,
+            "package{}".format(i // 10000),
+            "module{}".format(i // 100),
+            "file_{}.py".format(i),
+        )
+        for i in range(count)
+    ]
+    empty = hashlib.sha256(b"").hexdigest()
+    paths_json = {
+        "paths": [
+            {"_path": path, "path_type": "hardlink", "sha256": empty, "size_in_bytes": 0}
+            for path in paths
+        ],
+        "paths_version": 1,
+    }
+    index = {"name": "bench", "version": "1.0", "build": "py38_0", "platform": "linux",
+             "subdir": "linux-64", "depends": [], "license": "BSD"}
+    package = os.path.join(directory, "bench-1.0-py38_0.tar.bz2")
+    with tarfile.open(package, "w:bz2") as tar:
+        for name, contents in (("info/index.json", json.dumps(index).encode()),
+                               ("info/files", "\n".join(paths).encode()),
+                               ("info/paths.json", json.dumps(paths_json).encode())):
+            member = tarfile.TarInfo(name)
+            member.size = len(contents)
+            tar.addfile(member, io.BytesIO(contents))
+        for path in paths:
+            tar.addfile(tarfile.TarInfo(path))
+    return package
+
+
+def peak_rss_growth(package, extract):
+    """Verify package and return the growth of the peak RSS in MiB."""
+    from conda_verify import checks
+    from conda_verify.verify import Verify
+
+    if extract:
+        checks.can_stream = lambda path: False
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    path, errors = Verify.verify_package(path_to_package=package, hash_threads=1)
+    assert errors == [], errors
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (after - before) / 1024.0
+
+
+def main(count=200000):
+    directory = tempfile.mkdtemp()
+    try:
+        package = make_package(directory, count)
+        for mode in ("stream", "extract"):
+            growth = subprocess.check_output(
+                [sys.executable, __file__, "--measure", package, mode]
+            )
+            growth = float(growth.splitlines()[-1])
+            print("{:>8} {:>7} files: {:8.1f} MiB".format(mode, count, growth))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        print(peak_rss_growth(sys.argv[2], sys.argv[3] == "extract"))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+"""Time validating the version specs of dependencies.
+
+The pattern version specs used to be matched with backtracks for a time
+exponential in the length of a run of digits followed by an invalid
+character.  Both patterns are timed on typical specs, and on growing runs
+of digits followed by an invalid character.
+
+Usage: python benchmarks/bench_ver_spec.py [longest run of digits]
+"""
+import sys
+import time
+
+from conda_verify.checks import valid_ver_spec
+from conda_verify.utilities import fullmatch
+
+
+BACKTRACKING_VER_SPEC_PAT = r"^(?:[><=]{0,2}(?:(?:[\d\*]+[!\._]?){1,})[+\w\*]*[|,]?){1,}"
+SPECS = [">=1.2", "==1.2.2", ">=2,<3", "<=2.0.0*,<3.0.0*", ">=1.9.3,<2.0.0a0", "1.0|1.2.*"]
+
+
+def timed(function, specs, repeat=1):
+    start = time.time()
+    for _ in range(repeat):
+        for spec in specs:
+            function(spec)
+    return time.time() - start
+
+
+def main(longest=14):
+    patterns = (
+        ("backtracking", lambda spec: fullmatch(BACKTRACKING_VER_SPEC_PAT, spec)),
+        ("valid_ver_spec", valid_ver_spec),
+    )
+    repeat = 10000
+    for name, function in patterns:
+        seconds = timed(function, SPECS, repeat)
+        print("{:>14} {:>7} typical specs: {:8.3f} s".format(name, len(SPECS) * repeat, seconds))
+    for length in list(range(8, longest + 1, 2)) + [1000000]:
+        spec = "1" * length + "@"
+        for name, function in patterns:
+            if length <= longest or function is valid_ver_spec:
+                seconds = timed(function, [spec])
+                print("{:>14} {:>7} digits and @: {:8.3f} s".format(name, length, seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
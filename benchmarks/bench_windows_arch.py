@@ -0,0 +1,86 @@
+"""Time check_windows_arch on a Windows package with many DLLs.
+
+The object type of a DLL used to be found by reading its first 4096 bytes
+and searching them for the PE signature.  That is timed on the extracted
+DLLs, along with check_windows_arch, which reads the few bytes up to the
+PE header that e_lfanew points to, on one thread and on a pool of threads.
+
+Usage: python benchmarks/bench_windows_arch.py [number of DLLs] [threads]
+"""
+import io
+import json
+import os
+import shutil
+import struct
+import sys
+import tarfile
+import tempfile
+import time
+
+from conda_verify.checks import HEADERS, INDEX, MEMBERS, CondaPackageCheck
+from conda_verify.constants import DLL_TYPES
+
+
+DLL_SIZE = 1 << 16
+
+
+def make_package(directory, count):
+    index = {"name": "bench", "version": "1.0", "build": "0", "arch": "x86_64",
+             "platform": "win", "subdir": "win-64"}
+    dll = bytearray(DLL_SIZE)
+    dll[:4] = b"MZ\x90\x00"
+    struct.pack_into("<I", dll, 0x3C, 0x100)
+    struct.pack_into("<4sH", dll, 0x100, b"PE\0\0", 0x8664)
+    paths = [os.path.join("Library", "bin", "lib{}.dll".format(i)) for i in range(count)]
+    package = os.path.join(directory, "bench-1.0-0.tar.bz2")
+    with tarfile.open(package, "w:bz2") as tar:
+        for name, contents in (("info/index.json", json.dumps(index).encode()),
+                               ("info/files", "\n".join(paths).encode())):
+            member = tarfile.TarInfo(name)
+            member.size = len(contents)
+            tar.addfile(member, io.BytesIO(contents))
+        for path in paths:
+            member = tarfile.TarInfo(path)
+            member.size = len(dll)
+            tar.addfile(member, io.BytesIO(bytes(dll)))
+    return package
+
+
+def first_page_object_types(package_check):
+    for member in package_check.paths.with_extension("dll"):
+        with open(os.path.join(package_check.tmpdir, member), "rb") as f:
+            data = f.read(4096)
+        pos = data.find(b"PE\0\0")
+        assert "DLL " + DLL_TYPES.get(data[pos + 4] + 256 * data[pos + 5]) == "DLL AMD64"
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def main(count=20000, threads=4):
+    directory = tempfile.mkdtemp()
+    try:
+        package = make_package(directory, count)
+        inputs = [INDEX, MEMBERS, HEADERS]
+        with CondaPackageCheck(package, extract=True, inputs=inputs,
+                               scratch_dir=directory) as package_check:
+            package_check.paths
+            for name, function, hash_threads in (
+                ("first page", first_page_object_types, 1),
+                ("PE header", CondaPackageCheck.check_windows_arch, 1),
+                ("PE header", CondaPackageCheck.check_windows_arch, threads),
+            ):
+                package_check.hash_threads = hash_threads
+                seconds, result = timed(function, package_check)
+                assert result is None
+                print("{:>10} {:>6} DLLs, {} threads: {:8.3f} s".format(
+                    name, count, hash_threads, seconds))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,107 @@
+"""Admission control for verifying many packages on a worker pool.
+
+Every task is given an estimate of its peak memory and scratch disk use,
+and tasks are only submitted to the executor while the estimates of the
+tasks in flight fit in the memory and disk limits.  A task that doesn't fit
+is passed over for smaller tasks behind it, so the workers stay busy, and a
+task larger than a whole limit runs once nothing else is in flight.
+"""
+import os
+from collections import namedtuple
+
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from conda_verify.archive import can_stream
+
+
+# the memory of a worker verifying a package: the interpreter, the stream
+# buffers and hash batches, and the per-member bookkeeping of the checks
+WORKER_MEMORY = 1 << 27
+MEMBER_MEMORY = 1 << 10
+# the estimated uncompressed size of a package, relative to its archive size,
+# and the estimated average size of a member
+COMPRESSION_RATIO = 4
+AVERAGE_MEMBER_SIZE = 1 << 14
+
+
+Footprint = namedtuple("Footprint", ["memory", "disk"])
+
+
+def estimate_footprint(path, metadata_only=False):
+    """Estimate the peak memory and scratch disk use of verifying the package at path.
+
+    The uncompressed size and member count are estimated from the archive
+    size alone, so no package is opened before its task is admitted.
+    """
+    uncompressed = os.path.getsize(path) * COMPRESSION_RATIO
+    if metadata_only:
+        return Footprint(WORKER_MEMORY, 0 if can_stream(path) else uncompressed)
+    members = uncompressed // AVERAGE_MEMBER_SIZE
+    disk = 0 if can_stream(path) else uncompressed
+    return Footprint(WORKER_MEMORY + members * MEMBER_MEMORY, disk)
+
+
+class AdmissionController(object):
+    """Submit tasks to an executor while their footprints fit in the limits.
+
+    Without a memory or disk limit every task is submitted right away.
+    """
+
+    def __init__(self, executor, max_workers, max_memory=None, max_disk=None):
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._pending = []
+        self._in_flight = {}
+        self._memory = 0
+        self._disk = 0
+
+    def add(self, footprint, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs), estimated to use footprint."""
+        self._pending.append((footprint, fn, args, kwargs))
+
+    def __len__(self):
+        return len(self._pending) + len(self._in_flight)
+
+    def _fits(self, footprint):
+        if self.max_memory is None and self.max_disk is None:
+            return True
+        if not self._in_flight:
+            return True
+        if len(self._in_flight) >= self.max_workers:
+            return False
+        return (
+            self.max_memory is None or self._memory + footprint.memory <= self.max_memory
+        ) and (self.max_disk is None or self._disk + footprint.disk <= self.max_disk)
+
+    def _admit(self):
+        passed_over = []
+        for task in self._pending:
+            footprint, fn, args, kwargs = task
+            if self._fits(footprint):
+                self._in_flight[self.executor.submit(fn, *args, **kwargs)] = footprint
+                self._reserve(footprint, 1)
+            else:
+                passed_over.append(task)
+        self._pending = passed_over
+
+    def _reserve(self, footprint, sign):
+        self._memory += sign * footprint.memory
+        self._disk += sign * footprint.disk
+
+    def as_completed(self):
+        """Yield the futures of the tasks as they complete, submitting queued
+        tasks whenever the footprints of the tasks in flight allow."""
+        while self._pending or self._in_flight:
+            self._admit()
+            done = wait(list(self._in_flight), return_when=FIRST_COMPLETED)[0]
+            for future in done:
+                self._reserve(self._in_flight.pop(future), -1)
+                yield future
+
+    def cancel(self):
+        """Drop the queued tasks and cancel the submitted ones that haven't started."""
+        self._pending = []
+        for future in self._in_flight:
+            future.cancel()
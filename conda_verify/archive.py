@@ -0,0 +1,168 @@
+"""Streaming access to the tarballs inside conda packages.
+
+Package members are read straight out of the decompressor, so checks can
+inspect a package without writing its payload to disk.  A ``.tar.bz2``
+package is a single tarball; a ``.conda`` package is a zip archive holding
+an ``info-*.tar.zst`` and a ``pkg-*.tar.zst`` tarball.
+
+Each member is described by a ``Member`` built from its tar header, or from
+a single ``lstat`` when the package had to be extracted instead.
+"""
+import json
+import os
+import stat
+import tarfile
+import zipfile
+from collections import namedtuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+FILE = "file"
+DIRECTORY = "directory"
+SYMLINK = "symlink"
+HARDLINK = "hardlink"
+OTHER = "other"
+
+
+class Member(namedtuple("Member", ["type", "size", "mode", "linkname"])):
+    """A package member: its type, size, permission bits and, for links, the
+    normalized package path of the link target."""
+
+    __slots__ = ()
+
+
+def _link_target(name, linkname):
+    return os.path.normpath(os.path.join(os.path.dirname(name), linkname))
+
+
+def tarinfo_member(name, tarinfo):
+    """Return the Member for tarinfo, stored at the normalized path name."""
+    mode = tarinfo.mode & 0o7777
+    if tarinfo.isdir():
+        return Member(DIRECTORY, 0, mode, None)
+    if tarinfo.issym():
+        return Member(SYMLINK, 0, mode, _link_target(name, tarinfo.linkname))
+    if tarinfo.islnk():
+        # hardlink targets are relative to the root of the archive
+        return Member(HARDLINK, 0, mode, os.path.normpath(tarinfo.linkname))
+    if tarinfo.isfile():
+        return Member(FILE, tarinfo.size, mode, None)
+    return Member(OTHER, 0, mode, None)
+
+
+def stat_member(root, name):
+    """Return the Member for the extracted file at name below root.
+
+    Extracting a hardlink yields a file with more than one link, but which
+    of the files was the link in the archive can't be told apart anymore.
+    """
+    path = os.path.join(root, name)
+    st = os.lstat(path)
+    mode = stat.S_IMODE(st.st_mode)
+    if stat.S_ISDIR(st.st_mode):
+        return Member(DIRECTORY, 0, mode, None)
+    if stat.S_ISLNK(st.st_mode):
+        return Member(SYMLINK, 0, mode, _link_target(name, os.readlink(path)))
+    if not stat.S_ISREG(st.st_mode):
+        return Member(OTHER, 0, mode, None)
+    if st.st_nlink > 1:
+        return Member(HARDLINK, st.st_size, mode, None)
+    return Member(FILE, st.st_size, mode, None)
+
+
+def can_stream(path):
+    """Return True if the package at path can be read without extracting it."""
+    if path.endswith(".conda"):
+        return zstandard is not None
+    return path.endswith((".tar.bz2", ".tar"))
+
+
+def is_split(path):
+    """Return True if the metadata and payload of the package at path are
+    stored in separate tarballs, so the metadata can be read on its own."""
+    return path.endswith(".conda")
+
+
+def _iter_conda_tarballs(path, components):
+    with zipfile.ZipFile(path) as conda_file:
+        names = conda_file.namelist()
+        for component_name in components:
+            for name in names:
+                if name.startswith(component_name + "-") and name.endswith(".tar.zst"):
+                    component = conda_file.open(name)
+                    try:
+                        reader = zstandard.ZstdDecompressor().stream_reader(component)
+                        with tarfile.open(fileobj=reader, mode="r|") as tar:
+                            yield tar
+                    finally:
+                        component.close()
+
+
+def iter_tarballs(path, components=("info", "pkg")):
+    """Yield each tarball of the package at path opened in stream mode.
+
+    components selects which tarballs of a .conda package are read, in order.
+    A .tar.bz2 package is a single tarball holding both, so it is always read
+    whole.
+    """
+    if path.endswith(".conda"):
+        for tar in _iter_conda_tarballs(path, components):
+            yield tar
+    else:
+        with tarfile.open(path, mode="r|*") as tar:
+            yield tar
+
+
+def iter_members(path, components=("info", "pkg")):
+    """Yield (TarInfo, fileobj) pairs for every member of the package at path.
+
+    Members are yielded in archive order.  fileobj is None for anything but
+    regular files, and is only readable until the next member is requested.
+    """
+    for tar in iter_tarballs(path, components):
+        for member in tar:
+            yield member, tar.extractfile(member) if member.isfile() else None
+            # a tarfile in stream mode keeps every TarInfo it has read
+            tar.members = []
+
+
+def _paths_json_size(contents):
+    """Return the total size of the files listed in info/paths.json, or None
+    if it can't be parsed or doesn't list the size of every file."""
+    try:
+        paths = json.loads(contents.decode("utf-8")).get("paths", [])
+        return sum(path["size_in_bytes"] for path in paths)
+    except (ValueError, AttributeError, TypeError, KeyError):
+        return None
+
+
+def uncompressed_size(path, components=("info", "pkg")):
+    """Return the total size of the regular files in the package at path.
+
+    The sizes of the info/ files are taken from their tar headers, and those
+    of the payload from info/paths.json, so only the stream up to the end of
+    info/ is decompressed when it comes first.  Otherwise the sizes of the
+    payload files are taken from their tar headers as well.
+    """
+    size = 0
+    paths_size = None
+    in_info = False
+    members = iter_members(path, components)
+    try:
+        for member, fileobj in members:
+            name = os.path.normpath(member.name)
+            if name == "info" or name.startswith("info" + os.path.sep):
+                in_info = True
+                if name == os.path.join("info", "paths.json") and fileobj is not None:
+                    paths_size = _paths_json_size(fileobj.read())
+            elif in_info and paths_size is not None:
+                return size + paths_size
+            if member.isfile():
+                size += member.size
+    finally:
+        members.close()
+    return size
@@ -0,0 +1,100 @@
+"""A persistent cache of package verification results.
+
+Results are stored in an SQLite database, keyed by the sha256 of the package
+file, the conda-verify version and the checks that were run.  A package is
+therefore only verified again when its contents, conda-verify or the selection
+of checks change.  The least recently used results are evicted once the cache
+holds more than max_entries results.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from conda_verify import __version__
+from conda_verify.checks import sha256_checksum
+from conda_verify.utilities import ensure_list
+
+
+DEFAULT_MAX_ENTRIES = 100000
+
+
+class ResultCache(object):
+    """Map packages to the findings of verifying them."""
+
+    def __init__(self, cache_dir, max_entries=None):
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self.path = os.path.join(cache_dir, "results.sqlite")
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        # several worker processes share the database, so wait for their locks
+        self._connection = sqlite3.connect(self.path, timeout=60)
+        with self._connection as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, findings TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters "
+                "(name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO counters VALUES (?, 0)", [("hits",), ("misses",)]
+            )
+
+    def close(self):
+        self._connection.close()
+
+    @staticmethod
+    def key(path, checks_to_ignore=None, metadata_only=False):
+        """Return the cache key of verifying the package at path.
+
+        checks_to_ignore and metadata_only select the checks that are run, as
+        they do for Verify.verify_package.
+        """
+        with open(path, "rb") as package:
+            package_digest = sha256_checksum(package)
+        ignored = sorted(set(code for code in ensure_list(checks_to_ignore) if code))
+        return hashlib.sha256(
+            json.dumps([__version__, package_digest, ignored, bool(metadata_only)]).encode(
+                "utf-8"
+            )
+        ).hexdigest()
+
+    def get(self, key):
+        """Return the findings stored for key, or None if there aren't any."""
+        with self._connection as connection:
+            row = connection.execute(
+                "SELECT findings FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                connection.execute(
+                    "UPDATE counters SET value = value + 1 WHERE name = 'misses'"
+                )
+                return None
+            connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            connection.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+        return json.loads(row[0])
+
+    def put(self, key, findings):
+        """Store findings for key, evicting the least recently used results."""
+        with self._connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (key, json.dumps(findings), time.time()),
+            )
+            connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def counters(self):
+        """Return the number of hits and misses since the cache was created."""
+        return dict(self._connection.execute("SELECT name, value FROM counters"))
@@ -5,45 +5,255 @@ Each class contains specific checks that relate to validating packages
 and recipes. These checks start with the letter 'C', which is an
 abbreviation for 'conda'.
 
-Checks C1101 through C1148 are housed in CondaPackageCheck.
+Checks C1101 through C1150 are housed in CondaPackageCheck.
 Checks C2101 through C2126 are housed in CondaRecipeCheck.
 """
+import errno
 import hashlib
+import io
+import itertools
 import json
+import mmap
 import os
 import re
 import sys
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import conda_package_handling.api
 
 try:
-    from tempfile import TemporaryDirectory
-except:
-    from backports.tempfile import TemporaryDirectory
-
+    from functools import lru_cache
+except ImportError:
+    from backports.functools_lru_cache import lru_cache
+
+from conda_verify.archive import (
+    DIRECTORY,
+    FILE,
+    HARDLINK,
+    SYMLINK,
+    can_stream,
+    is_split,
+    iter_members,
+    stat_member,
+    tarinfo_member,
+    uncompressed_size,
+)
 from conda_verify.errors import Error, PackageError
-from conda_verify.constants import FIELDS, LICENSE_FAMILIES, CONDA_FORGE_COMMENTS
+from conda_verify.paths import PathIndex, may_be_binary, scan_paths, sorted_difference
+from conda_verify.scratch import ScratchDirectory
+from conda_verify.constants import (
+    FIELDS,
+    LICENSE_FAMILIES,
+    CONDA_FORGE_COMMENTS,
+    SUBDIR_OBJECT_TYPES,
+)
 from conda_verify.utilities import (
     all_ascii,
+    architectures,
+    first_non_ascii,
+    available_cpus,
     get_bad_seq,
     get_object_type,
+    read_object_type,
     ensure_list,
-    fullmatch,
-    rm_rf,
 )
 
 
-ver_spec_pat = r"^(?:[><=]{0,2}(?:(?:[\d\*]+[!\._]?){1,})[+\w\*]*[|,]?){1,}"
+# the info/ files read into memory when a package is streamed
+INFO_FILES = ("index.json", "files", "has_prefix", "paths.json")
+
+# the inputs a package check can declare; each is loaded on first use
+INDEX = "index"  # info/index.json
+FILES = "files"  # info/files
+PREFIX = "prefix"  # info/has_prefix
+PATHS_JSON = "paths_json"  # info/paths.json
+MEMBERS = "members"  # the names and types of the package members
+HASHES = "hashes"  # the size and sha256 of every file
+HEADERS = "headers"  # the object type of every binary
+PAYLOAD_INPUTS = frozenset([MEMBERS, HASHES, HEADERS])
+ALL_INPUTS = frozenset([INDEX, FILES, PREFIX, PATHS_JSON]) | PAYLOAD_INPUTS
+
+# files are hashed in blocks of at least _MIN_BLOCK_SIZE and at most
+# _MAX_BLOCK_SIZE bytes, or memory-mapped from _MMAP_SIZE bytes up
+_MIN_BLOCK_SIZE = 1 << 12
+_MAX_BLOCK_SIZE = 1 << 20
+_MMAP_SIZE = 1 << 22
+
+# streamed members up to this size are hashed on a thread pool, and larger
+# ones block by block on a thread of their own
+_HASH_QUEUE_MEMBER_SIZE = 1 << 23
+_HASH_QUEUE_BATCH_SIZE = 1 << 20
+_HASH_QUEUE_SIZE = 1 << 26
+
+# the bytes of a binary that are hashed before the rest of it, and that its
+# headers are looked for in
+_HEADER_SIZE = 1 << 12
+
+_check_order = itertools.count()
+
+# a version in a version spec: a digit or *, followed by digits, *, word
+# characters and +, where each ! and . follows a digit or *
+_VERSION_PAT = r"[\d*][!.]?(?:[\d*][!.]?|[^\W\d]|\+)*"
+# a version spec: versions, each after up to two of <, > and =, that are
+# separated by | or , unless the next version has one of <, > and =, and may
+# end in | or ,.  It accepts the same specs as the nested repetitions it
+# replaces, but every character can only be matched one way, so matching
+# takes linear time rather than backtracking on long invalid specs.
+ver_spec_pat = (
+    r"[><=]{0,2}"
+    + _VERSION_PAT
+    + r"(?:(?:[|,][><=]{0,2}|[><=]{1,2})"
+    + _VERSION_PAT
+    + r")*[|,]?"
+)
+_ver_spec_re = re.compile(r"(?:" + ver_spec_pat + r")\Z")
+
+
+def valid_ver_spec(spec):
+    """Return whether spec is a valid version spec of a dependency."""
+    return _ver_spec_re.match(spec) is not None
+
+
+# the number of dependencies split_dependency keeps the results of
+_DEPENDENCY_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=_DEPENDENCY_CACHE_SIZE)
+def split_dependency(dependency):
+    """Return the parts of dependency, and whether its version spec is valid.
+
+    The same dependencies are found in many packages and recipes, so the
+    results are kept for the most recent ones in each process.
+    """
+    parts = tuple(dependency.split())
+    return parts, len(parts) < 2 or valid_ver_spec(parts[1])
+
+
+def dependency_cache_counters():
+    """Return the hits and misses of split_dependency in this process."""
+    info = split_dependency.cache_info()
+    return {"hits": info.hits, "misses": info.misses}
+
+
+def check(*codes, **options):
+    """Register a check method along with the codes it can report.
+
+    Package checks declare the parts of the package they read as inputs, and
+    are marked with metadata=True if they are run in metadata-only mode.  A
+    check with any of the PAYLOAD_INPUTS reads the payload of the package.
+    """
+
+    def register(method):
+        method.codes = codes
+        method.inputs = frozenset(options.get("inputs", ()))
+        method.payload = bool(method.inputs & PAYLOAD_INPUTS)
+        method.metadata = options.get("metadata", False)
+        method.order = next(_check_order)
+        return method
+
+    return register
+
+
+def registered_checks(cls, checks_to_ignore=None, metadata_only=False):
+    """Return the names of the checks of cls in the order they are defined.
+
+    Checks whose codes are all in checks_to_ignore are left out, as are
+    checks that aren't run in metadata-only mode if metadata_only is True.
+    """
+    ignored = set(ensure_list(checks_to_ignore))
+    methods = [
+        getattr(cls, name)
+        for name in dir(cls)
+        if name.startswith("check") and hasattr(getattr(cls, name), "codes")
+    ]
+    return [
+        method.__name__
+        for method in sorted(methods, key=lambda method: method.order)
+        if not ignored.issuperset(method.codes)
+        and (method.metadata or not metadata_only)
+    ]
+
+
+def required_inputs(cls, checks):
+    """Return the inputs declared by the checks of cls named in checks."""
+    return frozenset(
+        itertools.chain.from_iterable(getattr(cls, name).inputs for name in checks)
+    )
+
+
+# member names and the paths in info/paths.json are interned, so that each
+# path is stored once however many tables it's a key of; Python 2 can't
+# intern unicode strings
+_intern = getattr(sys, "intern", lambda string: string)
+
+
+def _intern_path(entry):
+    """Intern the path of an entry of info/paths.json as it's decoded."""
+    if "_path" in entry:
+        entry["_path"] = _intern(entry["_path"])
+    return entry
+
+
+def _block_size(size):
+    """Return the read size used to hash a file of the given size.
+
+    Small files are read in one block, large ones in blocks of up to 1 MiB.
+    """
+    return min(max(size + 1, _MIN_BLOCK_SIZE), _MAX_BLOCK_SIZE)
+
+
+def _update_hash(hash_impl, fd, buffersize=65536):
+    """Feed the rest of fd to hash_impl and return the number of bytes read.
 
+    Blocks are read into a single reusable buffer, so no bytes objects are
+    allocated per block.
+    """
+    buf = bytearray(buffersize)
+    view = memoryview(buf)
+    size = 0
+    while True:
+        length = fd.readinto(buf)
+        if not length:
+            return size
+        hash_impl.update(view[:length])
+        size += length
 
-def _checksum(fd, algorithm, buffersize=65536):
-    hash_impl = getattr(hashlib, algorithm)
+
+def _checksum(fd, algorithm, buffersize=None):
+    """Return the hex digest of the rest of fd.
+
+    Files of at least _MMAP_SIZE bytes are memory-mapped and hashed without
+    copying them into Python objects.  Anything else is read in blocks of
+    buffersize bytes, which defaults to a size suited to the file.
+    """
+    hash_impl = getattr(hashlib, algorithm, None)
     if not hash_impl:
         raise ValueError("Unrecognized hash algorithm: {}".format(algorithm))
     else:
         hash_impl = hash_impl()
-    for block in iter(lambda: fd.read(buffersize), b""):
-        hash_impl.update(block)
+    try:
+        size = os.fstat(fd.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        size = None
+
+    if size is not None and size >= _MMAP_SIZE and fd.tell() == 0:
+        try:
+            mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, mmap.error):
+            pass
+        else:
+            try:
+                hash_impl.update(mapped)
+            finally:
+                mapped.close()
+            return hash_impl.hexdigest()
+
+    if buffersize is None:
+        buffersize = 65536 if size is None else _block_size(size)
+    _update_hash(hash_impl, fd, buffersize)
     return hash_impl.hexdigest()
 
 
@@ -51,53 +261,691 @@ def sha256_checksum(fd):
     return _checksum(fd, "sha256")
 
 
+def _hash_members(members):
+    """Return (name, size, sha256 digest) for each (name, data) pair in members."""
+    return [(name, len(data), hashlib.sha256(data).hexdigest()) for name, data in members]
+
+
+def _hash_block(hash_impl, block):
+    hash_impl.update(block)
+    return ()
+
+
+def _member_digest(name, size, hash_impl):
+    return [(name, size, hash_impl.hexdigest())]
+
+
+class _HashQueue(object):
+    """Hash streamed members on a pool of threads while the stream is read.
+
+    Small members are batched so that each task hashes at least
+    _HASH_QUEUE_BATCH_SIZE bytes, while large members are read in blocks that
+    are hashed in order on a thread of their own.  At most _HASH_QUEUE_SIZE
+    bytes are held in memory while waiting to be hashed.  Results are passed
+    to record(name, size, sha256_digest) on the thread that submitted them.
+    """
+
+    def __init__(self, threads, record):
+        self._executor = ThreadPoolExecutor(threads)
+        # a single thread, so that the blocks of a member are hashed in order
+        self._block_executor = ThreadPoolExecutor(1)
+        self._record = record
+        self._batch = []
+        self._batch_size = 0
+        self._pending = deque()
+        self._pending_size = 0
+
+    def submit(self, name, data):
+        """Queue data, the contents of the member name, for hashing."""
+        self._batch.append((name, data))
+        self._batch_size += len(data)
+        if self._batch_size >= _HASH_QUEUE_BATCH_SIZE:
+            self._flush()
+        self._limit()
+
+    def submit_blocks(self, name, fileobj, data=b""):
+        """Read the rest of the member name from fileobj in blocks, after data,
+        and queue them for hashing."""
+        hash_impl = hashlib.sha256()
+        size = 0
+        while True:
+            if data:
+                size += len(data)
+                future = self._block_executor.submit(_hash_block, hash_impl, data)
+                self._pending.append((future, len(data)))
+                self._pending_size += len(data)
+                self._limit()
+            data = fileobj.read(_MAX_BLOCK_SIZE)
+            if not data:
+                break
+        future = self._block_executor.submit(_member_digest, name, size, hash_impl)
+        self._pending.append((future, 0))
+
+    def _limit(self):
+        while self._pending_size > _HASH_QUEUE_SIZE:
+            self._collect()
+
+    def _flush(self):
+        if self._batch:
+            future = self._executor.submit(_hash_members, self._batch)
+            self._pending.append((future, self._batch_size))
+            self._pending_size += self._batch_size
+            self._batch = []
+            self._batch_size = 0
+
+    def _collect(self):
+        future, size = self._pending.popleft()
+        self._pending_size -= size
+        for result in future.result():
+            self._record(*result)
+
+    def join(self):
+        """Wait until every queued member has been hashed and recorded."""
+        self._flush()
+        while self._pending:
+            self._collect()
+
+    def close(self):
+        for future, size in self._pending:
+            future.cancel()
+        self._executor.shutdown()
+        self._block_executor.shutdown()
+
+
 class CondaPackageCheck(object):
     """Create checks in order to validate conda package tarballs."""
 
-    def __init__(self, path):
-        """Initialize conda package information for use with package checks."""
+    def __init__(
+        self,
+        path,
+        extract=False,
+        metadata_only=False,
+        hash_threads=None,
+        on_metadata=None,
+        on_error=None,
+        scratch_dir=None,
+        scratch_budget=None,
+        inputs=None,
+    ):
+        """Initialize conda package information for use with package checks.
+
+        The package is streamed member by member unless extract is True or the
+        package format can't be streamed, in which case it is extracted below
+        scratch_dir, or the default temporary directory, instead.  The size of
+        the extracted files is reserved from scratch_budget, a ScratchBudget,
+        while the package check is open.
+
+        inputs are the inputs declared by the checks that will be run, and
+        default to ALL_INPUTS.  Each input is loaded the first time it's used,
+        and the payload is only read up front if one of PAYLOAD_INPUTS is
+        among them.  File hashes and headers are only kept while the payload
+        is streamed if HASHES and HEADERS are among inputs; if either is used
+        anyway, the payload is streamed again to collect it.
+
+        If metadata_only is True, reading stops once the info/ files have been
+        collected, and only METADATA_CHECKS may be run on the package.
+
+        Files are hashed on hash_threads threads, which defaults to the number
+        of available CPUs.
+
+        on_metadata is called with the package check as soon as the info/ files
+        have been read, and on_error with each Error found while the package is
+        streamed.  Either may raise to stop reading the package.
+
+        Use the package check as a context manager, or call close() when done
+        with it, to remove the temporary directory of an extracted package.
+        """
         super(CondaPackageCheck, self).__init__()
         self.path = path
+        self.metadata_only = metadata_only
+        self.inputs = ALL_INPUTS if inputs is None else frozenset(inputs)
+        if metadata_only:
+            self.inputs -= PAYLOAD_INPUTS
+        self.hash_threads = hash_threads or available_cpus()
+        self.on_metadata = on_metadata
+        self.on_error = on_error
+        self.scratch_dir = scratch_dir
+        self.scratch_budget = scratch_budget
         self.dist = self.retrieve_package_name(self.path)
+        self.name, self.version, self.build = self.dist.rsplit("-", 2)
+        self.name_pat = re.compile(r"[a-z0-9_][a-z0-9_\-\.]*$")
+        self.hash_pat = re.compile(r"[gh][0-9a-f]{5,}", re.I)
+        self.version_pat = re.compile(r"[\w\.]+$")
+
+        self._tmpdir = None
+        self.tmpdir = None
+        self._path_index = None
+        self._files_index = None
+        self._path_scan = None
+        try:
+            if extract or not can_stream(self.path):
+                self._read_extracted()
+            else:
+                try:
+                    self._read_stream()
+                except (tarfile.TarError, zipfile.BadZipfile):
+                    self._read_extracted()
+        except BaseException:
+            self.close()
+            raise
+
+    def _clear_info(self):
+        """Forget the info/ files that have been read, and what was parsed from them."""
+        self._info_files = dict()
+        # False while a stream stopped in the middle of info/
+        self._info_complete = True
+        self._info = None
+        self._paths_json = None
+        self._paths_json_path = None
+
+    def _set_metadata(self):
+        """Hand the package to on_metadata once its info/ files can be read."""
+        self._metadata_ready = True
+        if self.on_metadata is not None:
+            self.on_metadata(self)
+
+    def _info_file(self, filename, required=False):
+        """Return the contents of info/filename, or None if there is no such file.
+
+        Streamed info/ files are kept as they are read, and the rest of info/
+        is streamed again if reading stopped before it.  Extracted info/ files
+        are read on first use.  IOError is raised if a required file is missing.
+        """
+        if filename not in self._info_files and self.tmpdir is not None:
+            try:
+                with open(os.path.join(self.tmpdir, "info", filename), "rb") as f:
+                    self._info_files[filename] = f.read()
+            except IOError:
+                if required:
+                    raise
+                self._info_files[filename] = None
+        elif filename not in self._info_files and not self._info_complete:
+            self._read_rest_of_info()
+        contents = self._info_files.get(filename)
+        if contents is None and required:
+            raise IOError(
+                errno.ENOENT,
+                u"No such file or directory in {}".format(self.path),
+                os.path.join("info", filename),
+            )
+        return contents
+
+    @property
+    def index(self):
+        """The contents of info/index.json."""
+        return self._info_file("index.json", required=True)
+
+    @property
+    def files_file(self):
+        """The contents of info/files."""
+        return self._info_file("files", required=True)
+
+    @property
+    def prefix_file(self):
+        """The contents of info/has_prefix, or None if there is none."""
+        return self._info_file("has_prefix")
+
+    @property
+    def info(self):
+        """The parsed contents of info/index.json."""
+        if self._info is None:
+            self._info = json.loads(self.index.decode("utf-8"))
+        return self._info
+
+    @property
+    def win_pkg(self):
+        return bool(self.info["platform"] == "win")
+
+    @property
+    def paths_json(self):
+        """The parsed contents of info/paths.json, or {} if there is none."""
+        if self._paths_json is None:
+            self._load_paths_json()
+        return self._paths_json
+
+    @property
+    def paths_json_path(self):
+        """The entries of info/paths.json, indexed by path."""
+        if self._paths_json_path is None:
+            self._load_paths_json()
+        return self._paths_json_path
+
+    def _load_paths_json(self):
+        contents = self._info_file("paths.json")
+        if contents is None:
+            self._set_paths_json({})
+        else:
+            self._set_paths_json(
+                json.loads(contents.decode("utf-8"), object_hook=_intern_path)
+            )
+
+    def _set_paths_json(self, paths_json):
+        """Store the contents of info/paths.json, indexed by path."""
+        self._paths_json = paths_json
+        self._paths_json_path = dict()
+        for path in paths_json.get("paths", []):
+            self._paths_json_path[path["_path"]] = path
 
-        self._tmpdir = TemporaryDirectory()
+    def _read_extracted(self):
+        """Extract the package to a scratch directory.
+
+        Only the info tarball of a .conda package is extracted here, and the
+        payload is left for _read_payload, as is indexing the members.
+        """
+        self._clear_info()
+        self._tmpdir = ScratchDirectory(self.scratch_dir, self.scratch_budget)
         self.tmpdir = self._tmpdir.name
-        conda_package_handling.api.extract(self.path, self.tmpdir)
-        self.name, self.version, self.build = self.dist.rsplit("-", 2)
-        self.paths = self.archive_members = [
-            os.path.relpath(os.path.join(dp, f), self.tmpdir)
-            for dp, dn, filenames in os.walk(self.tmpdir)
-            for f in filenames
-        ]
-        with open(os.path.join(self.tmpdir, "info", "index.json"), "rb") as f:
-            self.index = f.read()
-        self.info = json.loads(self.index.decode("utf-8"))
+        if is_split(self.path):
+            conda_package_handling.api.extract(self.path, self.tmpdir, components="info")
+        else:
+            if self.scratch_budget is not None:
+                try:
+                    self._tmpdir.reserve(uncompressed_size(self.path))
+                except (tarfile.TarError, IOError, EOFError):
+                    # extracting the package reports what's wrong with it
+                    pass
+            conda_package_handling.api.extract(self.path, self.tmpdir)
+        self._archive_members = []
+        self._member_index = dict()
+        self._payload_pending = True
+        self._set_metadata()
+
+    def _read_extracted_payload(self):
+        """Extract the payload of a .conda package, and index the extracted members."""
+        if is_split(self.path) and not self.metadata_only:
+            if self.scratch_budget is not None:
+                self._tmpdir.reserve(self._extracted_paths_size())
+            conda_package_handling.api.extract(self.path, self.tmpdir, components="pkg")
+        for dp, dn, filenames in os.walk(self.tmpdir):
+            for f in dn:
+                name = _intern(os.path.relpath(os.path.join(dp, f), self.tmpdir))
+                self._member_index[name] = stat_member(self.tmpdir, name)
+            for f in filenames:
+                name = _intern(os.path.relpath(os.path.join(dp, f), self.tmpdir))
+                self._member_index[name] = stat_member(self.tmpdir, name)
+                self._archive_members.append(name)
+
+    def _extracted_paths_size(self):
+        """Return the total size of the files listed in info/paths.json."""
+        return sum(
+            path.get("size_in_bytes", 0) for path in self.paths_json.get("paths", [])
+        )
 
-        with open(os.path.join(self.tmpdir, "info", "files"), "rb") as f:
-            self.files_file = f.read()
+    def _read_stream(self):
+        """Read the package by streaming its tar members.
 
-        try:
-            with open(os.path.join(self.tmpdir, "info", "has_prefix"), "rb") as f:
-                self.prefix_file = f.read()
-        except IOError:
-            self.prefix_file = None
+        Nothing is written to disk: the info/ files are kept in memory, while
+        every other regular file is hashed and sized as it is decompressed,
+        and compared to info/paths.json right away if that has been read.
+        The object types of executables and libraries are read from their
+        headers for check_windows_arch and check_binary_arch.
+
+        The payload of a .conda package lives in its own tarball, so only the
+        info tarball is read here and the payload is left for _read_payload.
+        A .tar.bz2 package is read whole if the payload is among inputs, and
+        up to the end of info/ otherwise.  In metadata-only mode the payload
+        is never read.
+        """
+        self._archive_members = []
+        self._member_index = dict()
+        self._stream_digests = dict()
+        self._stream_object_types = dict()
+        self._stream_compared = dict()
+        self._streamed_inputs = set()
+        self._metadata_ready = False
+        self._clear_info()
+
+        if is_split(self.path):
+            self._read_members(("info",))
+            self._payload_pending = not self.metadata_only
+        else:
+            stop_after_info = not self.inputs & PAYLOAD_INPUTS
+            stopped = self._read_members(("info", "pkg"), stop_after_info)
+            self._payload_pending = stopped and not self.metadata_only
+        if not self._metadata_ready:
+            self._set_info_files()
+
+    def _set_info_files(self):
+        """Check that the info/ files read from the stream are complete."""
+        for filename in ("index.json", "files"):
+            self._info_file(filename, required=True)
+        self._set_metadata()
+
+    def _read_payload(self):
+        """Read the payload of the package if it hasn't been read yet."""
+        if self._payload_pending:
+            self._payload_pending = False
+            if self.tmpdir is not None:
+                self._read_extracted_payload()
+            elif is_split(self.path):
+                self._read_members(("pkg",))
+            else:
+                self._read_members(("info", "pkg"))
 
-        self.paths_json_path = dict()
+    def _read_rest_of_info(self):
+        """Keep the info/ files a stream stopped before, reading up to the end of info/."""
+        self._info_complete = True
+        in_info = False
+        members = iter_members(self.path, ("info",))
         try:
-            with open(os.path.join(self.tmpdir, 'info', 'paths.json')) as f:
-                self.paths_json = json.load(f)
-                for path in self.paths_json['paths']:
-                    self.paths_json_path[path["_path"]] = path
-        except IOError:
-            self.paths_json = {}
-
-        self.win_pkg = bool(self.info["platform"] == "win")
-        self.name_pat = re.compile(r"[a-z0-9_][a-z0-9_\-\.]*$")
-        self.hash_pat = re.compile(r"[gh][0-9a-f]{5,}", re.I)
-        self.version_pat = re.compile(r"[\w\.]+$")
+            for member, fileobj in members:
+                name = os.path.normpath(member.name)
+                if name == "info" or name.startswith("info" + os.path.sep):
+                    in_info = True
+                    filename = os.path.basename(name)
+                    if (
+                        fileobj is not None
+                        and os.path.dirname(name) == "info"
+                        and filename in INFO_FILES
+                        and filename not in self._info_files
+                    ):
+                        self._info_files[filename] = fileobj.read()
+                elif in_info:
+                    break
+        finally:
+            members.close()
+
+    def _read_members(self, components, stop_after_info=False, restream=None):
+        """Record the members of the given package components.
+
+        Returns True if reading stopped after info/.  Payload files are hashed
+        on a pool of hash_threads threads while the stream is read.
+
+        If restream is a set of inputs, the components are being read again
+        only to collect those, and the members recorded before are kept.
+        """
+        inputs = self.inputs if restream is None else restream
+        hash_queue = None
+        if HASHES in inputs and self.hash_threads > 1 and "pkg" in components:
+            hash_queue = _HashQueue(self.hash_threads, self._record_digest)
+        try:
+            stopped = self._read_member_stream(
+                components, hash_queue, stop_after_info, restream
+            )
+            if hash_queue is not None:
+                hash_queue.join()
+        finally:
+            if hash_queue is not None:
+                hash_queue.close()
+        if "pkg" in components and not stopped:
+            self._streamed_inputs |= inputs & {HASHES, HEADERS}
+            if "info" in components:
+                self._info_complete = True
+        return stopped
+
+    def _read_member_stream(self, components, hash_queue, stop_after_info, restream=None):
+        """Read the members of the given package components in archive order.
+
+        The info/ files are stored as soon as the stream has passed the info/
+        members.  If stop_after_info is True, reading stops there, or as soon
+        as the info/ files used by the declared inputs are found.
+        """
+        members = iter_members(self.path, components)
+        try:
+            return self._read_member_iter(members, hash_queue, stop_after_info, restream)
+        finally:
+            # stop decompressing if reading was cut short
+            members.close()
+
+    def _read_member_iter(self, members, hash_queue, stop_after_info, restream=None):
+        inputs = self.inputs if restream is None else restream
+        hash_files = HASHES in inputs
+        keep_headers = HEADERS in inputs
+        wanted_info_files = ["index.json", "files", "has_prefix"]
+        if PATHS_JSON in self.inputs:
+            wanted_info_files.append("paths.json")
+        in_info = False
+        for member, fileobj in members:
+            name = _intern(os.path.normpath(member.name))
+            if name == "info" or name.startswith("info" + os.path.sep):
+                in_info = True
+            elif (
+                in_info
+                and not self._metadata_ready
+                and "index.json" in self._info_files
+                and "files" in self._info_files
+            ):
+                self._set_info_files()
+                if stop_after_info:
+                    return True
+            if stop_after_info and all(f in self._info_files for f in wanted_info_files):
+                self._set_info_files()
+                # the info/ files after the wanted ones haven't been read
+                self._info_complete = False
+                return True
+            entry = tarinfo_member(name, member)
+            if restream is None:
+                previous = self._member_index.get(name)
+                self._member_index[name] = entry
+                if entry.type != DIRECTORY and (
+                    previous is None or previous.type == DIRECTORY
+                ):
+                    self._archive_members.append(name)
+            if entry.type == DIRECTORY:
+                continue
+
+            if entry.type == SYMLINK:
+                # links are compared once the whole package has been read
+                self._stream_compared.pop(name, None)
+                continue
+
+            if entry.type == HARDLINK:
+                # extracting a hardlink yields a copy of the file it points to
+                target = entry.linkname
+                if hash_queue is not None:
+                    hash_queue.join()
+                if target in self._stream_digests:
+                    self._record_digest(name, *self._stream_digests[target])
+                    if target in self._stream_object_types:
+                        self._stream_object_types[name] = self._stream_object_types[target]
+            elif fileobj is None:
+                continue
+            elif os.path.dirname(name) == "info" and os.path.basename(name) in INFO_FILES:
+                if os.path.basename(name) in self._info_files:
+                    # already kept while reading up to the end of info/
+                    continue
+                data = fileobj.read()
+                self._info_files[os.path.basename(name)] = data
+                if hash_files:
+                    self._record_digest(name, len(data), hashlib.sha256(data).hexdigest())
+            elif not hash_files:
+                if keep_headers and may_be_binary(name):
+                    self._record_object_type(name, read_object_type(fileobj))
+            elif hash_queue is not None and member.size <= _HASH_QUEUE_MEMBER_SIZE:
+                data = fileobj.read()
+                if keep_headers and may_be_binary(name):
+                    self._record_object_type(name, get_object_type(data))
+                hash_queue.submit(name, data)
+            elif hash_queue is not None:
+                header = b""
+                if keep_headers and may_be_binary(name):
+                    header = fileobj.read(_HEADER_SIZE)
+                    self._record_object_type(name, get_object_type(header))
+                hash_queue.submit_blocks(name, fileobj, header)
+            else:
+                hash_impl = hashlib.sha256()
+                size = 0
+                if keep_headers and may_be_binary(name):
+                    header = fileobj.read(_HEADER_SIZE)
+                    self._record_object_type(name, get_object_type(header))
+                    hash_impl.update(header)
+                    size = len(header)
+                size += _update_hash(hash_impl, fileobj, _block_size(member.size))
+                self._record_digest(name, size, hash_impl.hexdigest())
+        return False
+
+    def _stream_input(self, name):
+        """Make sure the streamed payload has been read with name, HASHES or
+        HEADERS, among inputs, streaming it again if it wasn't."""
+        if self.metadata_only:
+            raise ValueError("The payload isn't read in metadata-only mode")
+        if name not in self._streamed_inputs:
+            self.inputs |= {name}
+            if self._payload_pending:
+                self._read_payload()
+            else:
+                components = ("pkg",) if is_split(self.path) else ("info", "pkg")
+                self._read_members(components, restream={name})
+
+    def _record_object_type(self, name, object_type):
+        """Keep the object type of a streamed file, unless it isn't a binary."""
+        if object_type is not None:
+            self._stream_object_types[name] = object_type
+
+    def _record_digest(self, name, size, sha256_digest):
+        """Record the size and hash of a streamed file, comparing them to
+        info/paths.json if it has been read."""
+        self._stream_digests[name] = (size, sha256_digest)
+        if "paths.json" in self._info_files and name in self.paths_json_path:
+            error = self._paths_json_error(name, size, sha256_digest)
+            self._stream_compared[name] = error
+            if error is not None and self.on_error is not None:
+                self.on_error(error)
+
+    @property
+    def archive_members(self):
+        """A PathIndex of the names of all files in the package, reading its
+        payload if needed."""
+        self._read_payload()
+        if self._path_index is None:
+            # the names were collected in a list while the package was read
+            self._path_index = PathIndex(self._archive_members)
+            self._archive_members = None
+        return self._path_index
+
+    paths = archive_members
+
+    @property
+    def files_index(self):
+        """A PathIndex of the normalized paths listed in info/files."""
+        if self._files_index is None:
+            self._files_index = PathIndex(
+                [path.strip() for path in self.files_file.decode("utf-8").splitlines()],
+                normalize=True,
+            )
+        return self._files_index
+
+    @property
+    def _scanned_paths(self):
+        """The first path found for each code by scan_paths, scanning on first use."""
+        if self._path_scan is None:
+            self._path_scan = scan_paths(self.paths)
+        return self._path_scan
+
+    def _entry(self, member):
+        """Return the Member recorded for member, or None if there is none."""
+        self._read_payload()
+        return self._member_index.get(member)
+
+    def _resolve_link(self, member):
+        """Follow symlinks between package members, returning the final target."""
+        seen = set()
+        entry = self._entry(member)
+        while entry is not None and entry.type == SYMLINK and member not in seen:
+            seen.add(member)
+            member = entry.linkname
+            entry = self._entry(member)
+        return member
+
+    def _is_dir(self, member):
+        """Return True if member is, or links to, a directory."""
+        entry = self._entry(self._resolve_link(member))
+        return entry is not None and entry.type == DIRECTORY
+
+    def _is_hardlink(self, member):
+        """Return True if member is a hard link."""
+        entry = self._entry(member)
+        return entry is not None and entry.type == HARDLINK
+
+    def _paths_json_error(self, member, size, sha256_digest):
+        """Return an Error if size or sha256_digest of member differ from paths.json."""
+        path = self.paths_json_path[member]
+        if size != path["size_in_bytes"]:
+            return Error(
+                self.path,
+                "C1147",
+                'Found file "{}" with filesize different than listed in paths.json'.format(
+                    member
+                ),
+            )
+        if sha256_digest != path["sha256"]:
+            return Error(
+                self.path,
+                "C1146",
+                'Found file "{}" with sha256 hash different than listed in paths.json'.format(
+                    member
+                ),
+            )
+
+    def _hash_and_size_error(self, member):
+        """Compare the file at member to its paths.json entry.
+
+        Links are followed, and members that aren't regular files are skipped.
+        Streamed members are usually compared as they are read; the rest are
+        compared against the size and hash recorded while streaming.
+        Extracted files are only hashed if their recorded size matches.
+        """
+        if self.tmpdir is None:
+            self._stream_input(HASHES)
+            if member in self._stream_compared:
+                return self._stream_compared[member]
+            size_and_digest = self._stream_digests.get(self._resolve_link(member))
+            if size_and_digest is not None:
+                return self._paths_json_error(member, *size_and_digest)
+        else:
+            entry = self._entry(self._resolve_link(member))
+            if entry is not None and entry.type in (FILE, HARDLINK):
+                sha256_digest = None
+                if entry.size == self.paths_json_path[member]["size_in_bytes"]:
+                    with open(os.path.join(self.tmpdir, member), "rb") as file_object:
+                        sha256_digest = sha256_checksum(file_object)
+                return self._paths_json_error(member, entry.size, sha256_digest)
+
+    def _object_types(self, members):
+        """Return an iterable of the object types of the binaries at members.
+
+        Extracted headers are read on hash_threads threads, a slice of the
+        members per thread rather than a task per member, and otherwise as
+        the object types are iterated over.
+        """
+        if self.tmpdir is None or self.hash_threads <= 1 or len(members) <= 1:
+            return map(self._object_type, members)
+        threads = min(self.hash_threads, len(members))
+        object_types = [None] * len(members)
+        with ThreadPoolExecutor(threads) as executor:
+            slices = executor.map(
+                self._read_object_types, [members[i::threads] for i in range(threads)]
+            )
+            for i, types in enumerate(slices):
+                object_types[i::threads] = types
+        return object_types
+
+    def _read_object_types(self, members):
+        return [self._object_type(member) for member in members]
+
+    def _object_type(self, member):
+        """Return the object type of the binary at member."""
+        if self.tmpdir is not None:
+            try:
+                with open(os.path.join(self.tmpdir, member), "rb") as file_object:
+                    return read_object_type(file_object)
+            except (IOError, OSError):
+                # a broken link
+                return None
+        self._stream_input(HEADERS)
+        return self._stream_object_types.get(self._resolve_link(member))
+
+    def close(self):
+        """Remove the temporary directory the package was extracted to."""
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self
 
     def __exit__(self, exc, value, tb):
-        rm_rf(self._tmpdir.name)
+        self.close()
 
     @staticmethod
     def retrieve_package_name(path):
@@ -122,6 +970,7 @@ class CondaPackageCheck(object):
                 )
             )
 
+    @check("C1101", "C1102", "C1103", inputs=(INDEX,), metadata=True)
     def check_package_name(self):
         """Check the package name located in info/index.json."""
         package_name = self.info.get("name")
@@ -144,6 +993,7 @@ class CondaPackageCheck(object):
                 ),
             )
 
+    @check("C1104", "C1105", "C1106", "C1107", inputs=(INDEX,), metadata=True)
     def check_package_version(self):
         """Check the package version located in info/index.json."""
         package_version = str(self.info.get("version"))
@@ -172,6 +1022,7 @@ class CondaPackageCheck(object):
                 ),
             )
 
+    @check("C1108", "C1109", inputs=(INDEX,), metadata=True)
     def check_build_number(self):
         """Check the build number located in info/index.json."""
         build_number = self.info.get("build_number")
@@ -192,6 +1043,7 @@ class CondaPackageCheck(object):
                     "Build number in info/index.json must be an integer",
                 )
 
+    @check("C1110", "C1111", inputs=(INDEX,), metadata=True)
     def check_build_string(self):
         """Check the build string in info/index.json."""
         build_string = self.info.get("build")
@@ -212,6 +1064,7 @@ class CondaPackageCheck(object):
                 ),
             )
 
+    @check("C1112", inputs=(INDEX,), metadata=True)
     def check_index_dependencies(self):
         """Check that the dependencies field is present in info/index.json."""
         depends = self.info.get("depends")
@@ -220,12 +1073,13 @@ class CondaPackageCheck(object):
                 self.path, "C1112", 'Missing "depends" field in info/index.json'
             )
 
+    @check("C1113", "C1114", inputs=(INDEX,), metadata=True)
     def check_index_dependencies_specs(self):
         """Check that the dependencies in info/index.json are properly formatted."""
         dependencies = ensure_list(self.info.get("depends"))
         if dependencies != [None]:
             for dependency in dependencies:
-                dependency_parts = dependency.split()
+                dependency_parts, valid_spec = split_dependency(dependency)
                 if len(dependency_parts) == 0:
                     return Error(
                         self.path,
@@ -234,7 +1088,7 @@ class CondaPackageCheck(object):
                     )
                 elif (
                     len(dependency_parts) == 2
-                    and not fullmatch(ver_spec_pat, dependency_parts[1])
+                    and not valid_spec
                     or len(dependency_parts) > 3
                 ):
                     return Error(
@@ -245,6 +1099,7 @@ class CondaPackageCheck(object):
                         ),
                     )
 
+    @check("C1115", inputs=(INDEX,), metadata=True)
     def check_license_family(self):
         """Check that the license family in info/index.json is valid."""
         license = self.info.get("license_family", self.info.get("license"))
@@ -255,6 +1110,7 @@ class CondaPackageCheck(object):
                 'Found invalid license "{}" in info/index.json'.format(license),
             )
 
+    @check("C1116", inputs=(INDEX,), metadata=True)
     def check_index_encoding(self):
         """Check that contents of info/index.json are all ascii characters."""
         if not all_ascii(self.index, self.win_pkg):
@@ -262,30 +1118,32 @@ class CondaPackageCheck(object):
                 self.path, "C1116", "Found non-ascii characters inside info/index.json"
             )
 
+    @check("C1118", inputs=(MEMBERS,))
     def check_members(self):
         """Check the tar archive members for non ascii characters."""
-        for member in self.archive_members:
-            if sys.version_info.major == 2:
-                unicode_path = member.decode("utf-8")
-            else:
-                unicode_path = member.encode("utf-8")
-
-            if not all_ascii(unicode_path):
-                return Error(
-                    self.path,
-                    "C1118",
-                    "Found archive member names containing non-ascii characters",
-                )
+        member = self.archive_members.first_non_ascii()
+        if member is not None:
+            return Error(
+                self.path,
+                "C1118",
+                "Found archive member names containing non-ascii characters: {}".format(
+                    member
+                ),
+            )
 
+    @check("C1119", inputs=(INDEX, FILES), metadata=True)
     def check_files_file_encoding(self):
         """Check the info/files file for non ascii characters."""
-        if not all_ascii(self.files_file, self.win_pkg):
+        offset = first_non_ascii(self.files_file, self.win_pkg)
+        if offset is not None:
             return Error(
                 self.path,
                 "C1119",
-                "Found filenames in info/files containing non-ascii characters",
+                "Found filenames in info/files containing non-ascii characters, "
+                "first on line {}".format(self.files_file.count(b"\n", 0, offset) + 1),
             )
 
+    @check("C1120", inputs=(FILES,), metadata=True)
     def check_files_file_for_info(self):
         """Check that the info/files file does not contain any files found within the info directory."""
         filenames = [
@@ -299,6 +1157,7 @@ class CondaPackageCheck(object):
                     'Found filenames in info/files that start with "info"',
                 )
 
+    @check("C1121", inputs=(FILES,), metadata=True)
     def check_files_file_for_duplicates(self):
         """Check the info/files file for duplicates."""
         filenames = [
@@ -307,23 +1166,25 @@ class CondaPackageCheck(object):
         if len(filenames) != len(set(filenames)):
             return Error(self.path, "C1121", "Found duplicate filenames in info/files")
 
+    @check("C1122", "C1123", inputs=(FILES, MEMBERS))
     def check_files_file_for_validity(self):
-        """Check that the files listed in info/files exist in the tar archive and vice versa."""
-        members = set([
+        """Check that the files listed in info/files exist in the tar archive and vice versa.
+
+        Both are compared in sorted order, without building sets of them.
+        """
+        members = (
             member
-            for member in self.archive_members
-            if not os.path.isdir(os.path.join(self.tmpdir, member))
-            and not member.startswith("info")
-        ])
-        filenames = set([
+            for member in self.archive_members.sorted()
+            if not member.startswith("info") and not self._is_dir(member)
+        )
+        filenames = sorted(
             os.path.normpath(path.strip())
             for path in self.files_file.decode("utf-8").splitlines()
             if not path.strip().startswith("info")
-        ])
+        )
 
-        sorted_union_filenames = sorted(members.union(filenames))
-        for filename in sorted_union_filenames:
-            if filename not in members:
+        for filename, in_archive in sorted_difference(members, filenames):
+            if not in_archive:
                 return Error(
                     self.path,
                     "C1122",
@@ -331,7 +1192,7 @@ class CondaPackageCheck(object):
                         u"Found filename in info/files missing from tar " "archive: {}"
                     ).format(filename),
                 )
-            elif filename not in filenames:
+            else:
                 return Error(
                     self.path,
                     "C1123",
@@ -340,54 +1201,47 @@ class CondaPackageCheck(object):
                     ),
                 )
 
+    @check("C1124", inputs=(MEMBERS,))
     def check_for_hardlinks(self):
         """Check the tar archive for hardlinks."""
         for member in self.archive_members:
-            if os.path.islink(os.path.join(self.tmpdir, member)):
+            if self._is_hardlink(member):
                 return Error(
                     self.path,
                     "C1124",
                     u"Found hardlink {} in tar archive".format(member),
                 )
 
+    @check("C1125", inputs=(MEMBERS,))
     def check_for_unallowed_files(self):
         """Check the tar archive for unallowed directories."""
-        unallowed_directories = {"conda-meta", "conda-bld", "pkgs", "pkgs32", "envs"}
+        filepath = self._scanned_paths.get("C1125")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1125",
+                u"Found unallowed file in tar archive: {}".format(filepath),
+            )
 
-        for filepath in self.paths:
-            if filepath in unallowed_directories or filepath.endswith(
-                (".DS_Store", "~")
-            ):
+    @check("C1126", inputs=(INDEX, MEMBERS))
+    def check_for_noarch_info(self):
+        """Check that noarch Python packages contain the proper metadata files."""
+        filepath = self._scanned_paths.get("C1126")
+        if filepath is not None:
+            if self.info["subdir"] != "noarch" and "preferred_env" not in self.info:
                 return Error(
                     self.path,
-                    "C1125",
-                    u"Found unallowed file in tar archive: {}".format(filepath),
+                    "C1126",
+                    u"Found {} however package is not a noarch package".format(
+                        filepath
+                    ),
                 )
 
-    def check_for_noarch_info(self):
-        """Check that noarch Python packages contain the proper metadata files."""
-        for filepath in self.paths:
-            if filepath in (
-                os.path.join("info", "package_metadata.json"),
-                os.path.join("info", "link.json"),
-            ):
-                if self.info["subdir"] != "noarch" and "preferred_env" not in self.info:
-                    return Error(
-                        self.path,
-                        "C1126",
-                        u"Found {} however package is not a noarch package".format(
-                            filepath
-                        ),
-                    )
-
+    @check("C1127", inputs=(MEMBERS,))
     def check_for_bat_and_exe(self):
         """Check that both .bat and .exe files don't exist in the same package."""
-        bat_files = [
-            filepath[:-4] for filepath in self.paths if filepath.endswith(".bat")
-        ]
-        exe_files = [
-            filepath[:-4] for filepath in self.paths if filepath.endswith(".exe")
-        ]
+        bat_files = [filepath[:-4] for filepath in self.paths.with_extension("bat")]
+        exe_files = [filepath[:-4] for filepath in self.paths.with_extension("exe")]
 
         isect = set(bat_files).intersection(exe_files)
         if len(isect) > 0:
@@ -399,6 +1253,7 @@ class CondaPackageCheck(object):
                 ),
             )
 
+    @check("C1128", inputs=(INDEX, PREFIX), metadata=True)
     def check_prefix_file(self):
         """Check the info/has_prefix file for proper formatting."""
         if self.prefix_file is not None:
@@ -426,12 +1281,20 @@ class CondaPackageCheck(object):
                 return (placeholder, mode, filename)
         return None
 
+    @check("C1129", inputs=(FILES, PREFIX, MEMBERS), metadata=True)
     def check_prefix_file_filename(self):
-        """Check that the filenames in has_prefix exist in the archive."""
+        """Check that the filenames in has_prefix exist in the archive.
+
+        In metadata-only mode the filenames are looked up in info/files instead.
+        """
         if self.prefix_file_contents is not None:
             _, _, filename = self.prefix_file_contents
 
-            if os.path.normpath(filename) not in self.paths:
+            if self.metadata_only:
+                paths = self.files_index
+            else:
+                paths = self.paths
+            if os.path.normpath(filename) not in paths:
                 return Error(
                     self.path,
                     "C1129",
@@ -440,6 +1303,7 @@ class CondaPackageCheck(object):
                     ),
                 )
 
+    @check("C1130", inputs=(PREFIX,), metadata=True)
     def check_prefix_file_mode(self):
         """Check that the has_prefix mode is either binary or text."""
         if self.prefix_file_contents is not None:
@@ -452,6 +1316,7 @@ class CondaPackageCheck(object):
                     u'Found invalid mode "{}" in info/has_prefix'.format(mode),
                 )
 
+    @check("C1131", "C1132", "C1133", inputs=(INDEX, PREFIX), metadata=True)
     def check_prefix_file_binary_mode(self):
         """Check that the has_prefix file binary mode is correct."""
         if self.prefix_file_contents is not None:
@@ -479,116 +1344,107 @@ class CondaPackageCheck(object):
                         ),
                     )
 
+    @check("C1134", inputs=(MEMBERS,))
     def check_for_post_links(self):
         """Check the tar archive for pre and post link files."""
-        for filepath in self.paths:
-            if filepath.endswith(
-                (
-                    "-post-link.sh",
-                    "-pre-link.sh",
-                    "-pre-unlink.sh",
-                    "-post-link.bat",
-                    "-pre-link.bat",
-                    "-pre-unlink.bat",
-                )
-            ):
-                return Error(
-                    self.path,
-                    "C1134",
-                    u'Found pre/post link file "{}" in archive'.format(filepath),
-                )
+        filepath = self._scanned_paths.get("C1134")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1134",
+                u'Found pre/post link file "{}" in archive'.format(filepath),
+            )
 
+    @check("C1135", inputs=(MEMBERS,))
     def check_for_egg(self):
         """Check the tar archive for egg files."""
-        for filepath in self.paths:
-            if filepath.endswith(".egg"):
-                return Error(
-                    self.path,
-                    "C1135",
-                    u'Found egg file "{}" in archive'.format(filepath),
-                )
+        filepath = self._scanned_paths.get("C1135")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1135",
+                u'Found egg file "{}" in archive'.format(filepath),
+            )
 
+    @check("C1136", inputs=(MEMBERS,))
     def check_for_easy_install_script(self):
         """Check the tar archive for easy_install scripts."""
-        for filepath in self.paths:
-            if filepath.startswith(
-                (
-                    os.path.join("bin", "easy_install"),
-                    os.path.join("Scripts", "easy_install"),
-                )
-            ):
-                return Error(
-                    self.path,
-                    "C1136",
-                    u'Found easy_install script "{}" in archive'.format(filepath),
-                )
+        filepath = self._scanned_paths.get("C1136")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1136",
+                u'Found easy_install script "{}" in archive'.format(filepath),
+            )
 
+    @check("C1137", inputs=(MEMBERS,))
     def check_for_pth_file(self):
         """Check the tar archive for .pth files."""
-        for filepath in self.paths:
-            if filepath.endswith(".pth"):
-                return Error(
-                    self.path,
-                    "C1137",
-                    u'Found namespace file "{}" in archive'.format(
-                        os.path.normpath(filepath)
-                    ),
-                )
+        filepath = self._scanned_paths.get("C1137")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1137",
+                u'Found namespace file "{}" in archive'.format(
+                    os.path.normpath(filepath)
+                ),
+            )
 
+    @check("C1138", inputs=(MEMBERS,))
     def check_for_pyo_file(self):
         """Check the tar archive for .pyo files"""
-        for filepath in self.paths:
-            if filepath.endswith(".pyo") and self.name != "python":
-                return Error(
-                    self.path,
-                    "C1138",
-                    u'Found pyo file "{}" in archive'.format(filepath),
-                )
+        filepath = self._scanned_paths.get("C1138")
+        if filepath is not None and self.name != "python":
+            return Error(
+                self.path,
+                "C1138",
+                u'Found pyo file "{}" in archive'.format(filepath),
+            )
 
+    @check("C1139", inputs=(MEMBERS,))
     def check_for_pyc_in_site_packages(self):
         """Check that .pyc files are only found within the site-packages or disutils directories."""
-        for filepath in self.paths:
-            if (
-                filepath.endswith(".pyc")
-                and "site-packages" not in filepath
-                and "distutils" not in filepath
-            ):
-                return Error(
-                    self.path,
-                    "C1139",
-                    u'Found pyc file "{}" in invalid directory'.format(filepath),
-                )
+        filepath = self._scanned_paths.get("C1139")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1139",
+                u'Found pyc file "{}" in invalid directory'.format(filepath),
+            )
 
+    @check("C1140", inputs=(MEMBERS,))
     def check_for_2to3_pickle(self):
         """Check the tar archive for .pickle files."""
-        for filepath in self.paths:
-            if "lib2to3" in filepath and filepath.endswith(".pickle"):
-                return Error(
-                    self.path,
-                    "C1140",
-                    u'Found lib2to3 .pickle file "{}"'.format(filepath),
-                )
+        filepath = self._scanned_paths.get("C1140")
+        if filepath is not None:
+            return Error(
+                self.path,
+                "C1140",
+                u'Found lib2to3 .pickle file "{}"'.format(filepath),
+            )
 
+    @check("C1141", inputs=(MEMBERS,))
     def check_pyc_files(self):
         """Check that a .pyc file exists for every .py file in a Python 2 package."""
         if "py3" not in self.build:
-            for filepath in self.paths:
-                if "site-packages" in filepath:
-                    if filepath.endswith(".py") and (filepath + "c") not in self.paths:
-                        return Error(
-                            self.path,
-                            "C1141",
-                            u'Found python file "{}" without a corresponding pyc file'.format(
-                                filepath
-                            ),
-                        )
+            pyc_files = set(self.paths.with_extension("pyc"))
+            for filepath in self.paths.with_extension("py"):
+                if "site-packages" in filepath and (filepath + "c") not in pyc_files:
+                    return Error(
+                        self.path,
+                        "C1141",
+                        u'Found python file "{}" without a corresponding pyc file'.format(
+                            filepath
+                        ),
+                    )
 
+    @check("C1142", "C1143", inputs=(MEMBERS,))
     def check_menu_json_name(self):
         """Check that the Menu/package.json filename is identical to the package name."""
         menu_json_files = [
             filepath
-            for filepath in self.paths
-            if filepath.startswith("Menu" + os.path.sep) and filepath.endswith(".json")
+            for filepath in self.paths.in_directory("Menu")
+            if filepath.endswith(".json")
         ]
 
         if len(menu_json_files) == 1:
@@ -602,8 +1458,13 @@ class CondaPackageCheck(object):
         elif len(menu_json_files) > 1:
             return Error(self.path, "C1143", "Found more than one Menu json file")
 
+    @check("C1144", "C1145", inputs=(INDEX, MEMBERS, HEADERS))
     def check_windows_arch(self):
-        """Check that Windows package .exes and .dlls contain the correct headers."""
+        """Check that Windows package .exes and .dlls contain the correct headers.
+
+        Only the headers of the files are read, while the package is streamed
+        or, once it is extracted, on hash_threads threads.
+        """
         if self.win_pkg:
             arch = self.info["arch"]
             if arch not in ("x86", "x86_64"):
@@ -613,62 +1474,105 @@ class CondaPackageCheck(object):
                     u'Found unrecognized Windows architecture "{}"'.format(arch),
                 )
 
-            for member in self.archive_members:
-                if member.endswith((".exe", ".dll")):
-                    with open(os.path.join(self.tmpdir, member), "rb") as file_object:
-                        file_header = file_object.read(4096)
-                        file_object_type = get_object_type(file_header)
-                        if (arch == "x86" and file_object_type != "DLL I386") or (
-                            arch == "x86_64" and file_object_type != "DLL AMD64"
-                        ):
+            members = self.paths.with_extension("exe", "dll")
+            for member, file_object_type in zip(members, self._object_types(members)):
+                if (arch == "x86" and file_object_type != "DLL I386") or (
+                    arch == "x86_64" and file_object_type != "DLL AMD64"
+                ):
 
-                            return Error(
-                                self.path,
-                                "C1145",
-                                u'Found file "{}" with object type "{}" but with arch "{}"'.format(
-                                    member, file_object_type, arch
-                                ),
-                            )
+                    return Error(
+                        self.path,
+                        "C1145",
+                        u'Found file "{}" with object type "{}" but with arch "{}"'.format(
+                            member, file_object_type, arch
+                        ),
+                    )
 
+    @check("C1149", "C1150", inputs=(INDEX, MEMBERS, HEADERS))
+    def check_binary_arch(self):
+        """Check that the ELF binaries of Linux packages and the Mach-O binaries
+        of macOS packages are built for the subdir of the package.
+
+        Only the headers of the executables and libraries are read, as for
+        check_windows_arch.  A universal Mach-O binary needs to include the
+        architecture of the subdir.
+        """
+        subdir = self.info.get("subdir")
+        expected = SUBDIR_OBJECT_TYPES.get(subdir)
+        if expected is None:
+            return None
+        if subdir.startswith("osx-"):
+            code, binary_format = "C1150", "MachO-"
+        else:
+            code, binary_format = "C1149", "ELF"
+
+        members = [member for member in self.paths if may_be_binary(member)]
+        for member, file_object_type in zip(members, self._object_types(members)):
+            if (
+                file_object_type is not None
+                and file_object_type.startswith(binary_format)
+                and expected not in architectures(file_object_type)
+            ):
+                return Error(
+                    self.path,
+                    code,
+                    u'Found binary "{}" with object type "{}" but with subdir "{}"'.format(
+                        member, file_object_type, subdir
+                    ),
+                )
+
+    @check("C1146", "C1147", inputs=(PATHS_JSON, MEMBERS, HASHES))
     def check_package_hashes_and_size(self):
-        """Check the sha256 checksum and filesize of each file in the package."""
-        for member in self.archive_members:
-            file_path = os.path.join(self.tmpdir, member)
-            if member in self.paths_json_path:
-                if os.path.isfile(file_path):
-                    path = self.paths_json_path[member]
-                    size = os.stat(file_path).st_size
-                    if size != path["size_in_bytes"]:
-                        return Error(
-                            self.path,
-                            "C1147",
-                            'Found file "{}" with filesize different than listed in paths.json'.format(
-                                member
-                            ),
-                        )
-                    with open(file_path, "rb") as file_object:
-                        sha256_digest = sha256_checksum(file_object)
-                    if sha256_digest != path["sha256"]:
-                        return Error(
-                            self.path,
-                            "C1146",
-                            'Found file "{}" with sha256 hash different than listed in paths.json'.format(
-                                member
-                            ),
-                        )
+        """Check the sha256 checksum and filesize of each file in the package.
 
+        Extracted files are hashed on hash_threads threads, largest first.
+        The first mismatch in archive order is reported either way.
+        """
+        members = [
+            member for member in self.archive_members if member in self.paths_json_path
+        ]
+        if self.tmpdir is not None and self.hash_threads > 1:
+            largest_first = sorted(
+                members,
+                key=lambda member: self.paths_json_path[member].get("size_in_bytes", 0),
+                reverse=True,
+            )
+            with ThreadPoolExecutor(self.hash_threads) as executor:
+                errors = dict(
+                    zip(largest_first, executor.map(self._hash_and_size_error, largest_first))
+                )
+            get_error = errors.get
+        else:
+            get_error = self._hash_and_size_error
+
+        for member in members:
+            error = get_error(member)
+            if error is not None:
+                return error
+
+    @check("C1148", inputs=(INDEX, MEMBERS))
     def check_noarch_files(self):
         """Check that noarch packages do not contain architecture specific files."""
         if self.info["subdir"] == "noarch":
-            for filepath in self.paths:
-                if filepath.endswith((".so", ".dylib", ".dll", "lib")):
-                    return Error(
-                        self.path,
-                        "C1148",
-                        u'Found architecture specific file "{}" in package.'.format(
-                            filepath
-                        ),
-                    )
+            filepath = self._scanned_paths.get("C1148")
+            if filepath is not None:
+                return Error(
+                    self.path,
+                    "C1148",
+                    u'Found architecture specific file "{}" in package.'.format(
+                        filepath
+                    ),
+                )
+
+
+# package checks that read the payload, along with the codes they can report,
+# and the package checks run in metadata-only mode
+PAYLOAD_CHECKS = dict(
+    (name, getattr(CondaPackageCheck, name).codes)
+    for name in registered_checks(CondaPackageCheck)
+    if getattr(CondaPackageCheck, name).payload
+)
+METADATA_CHECKS = tuple(registered_checks(CondaPackageCheck, metadata_only=True))
 
 
 class CondaRecipeCheck(object):
@@ -688,6 +1592,7 @@ class CondaRecipeCheck(object):
             "sha256": re.compile(r"[a-f0-9]{64}$"),
         }
 
+    @check("C2101", "C2102", "C2103")
     def check_package_name(self):
         """Check the package name in meta.yaml for proper formatting."""
         package_name = self.meta.get("package", {}).get("name", "")
@@ -712,6 +1617,7 @@ class CondaRecipeCheck(object):
                 u'Found invalid sequence "{}" in package name'.format(seq),
             )
 
+    @check("C2104", "C2105", "C2106")
     def check_package_version(self):
         """Check the package version in meta.yaml for proper formatting."""
         package_version = self.meta.get("package", {}).get("version", "")
@@ -743,6 +1649,7 @@ class CondaRecipeCheck(object):
                     u'Found invalid sequence "{}" in package version'.format(seq),
                 )
 
+    @check("C2107", "C2108")
     def check_build_number(self):
         """Check the build number in meta.yaml for proper formatting."""
         build_number = self.meta.get("build", {}).get("number")
@@ -764,6 +1671,7 @@ class CondaRecipeCheck(object):
                     "Build number in info/index.json must be an integer",
                 )
 
+    @check("C2109", "C2110")
     def check_fields(self):
         """Check that the fields listed in meta.yaml are valid."""
 
@@ -800,13 +1708,14 @@ class CondaRecipeCheck(object):
                                     ),
                                 )
 
+    @check("C2111", "C2112", "C2113", "C2114", "C2115", "C2116")
     def check_requirements(self):
         """Check that the requirements listed in meta.yaml are valid."""
         build_requirements = self.meta.get("requirements", {}).get("build", [])
         run_requirements = self.meta.get("requirements", {}).get("run", [])
 
         for requirement in build_requirements + run_requirements:
-            requirement_parts = requirement.split()
+            requirement_parts, valid_spec = split_dependency(requirement)
             requirement_name = requirement_parts[0]
 
             if not self.name_pat.match(requirement_name):
@@ -828,9 +1737,7 @@ class CondaRecipeCheck(object):
                     self.recipe_dir, "C2113", "Found empty dependencies in meta.yaml"
                 )
 
-            elif len(requirement_parts) >= 2 and not fullmatch(
-                ver_spec_pat, requirement_parts[1]
-            ):
+            elif not valid_spec:
                 return Error(
                     self.recipe_dir,
                     "C2114",
@@ -851,6 +1758,7 @@ class CondaRecipeCheck(object):
                 u"Found duplicate run requirements: {}".format(run_requirements),
             )
 
+    @check("C2117", "C2118")
     def check_about(self):
         """Check the about field in meta.yaml for proper formatting."""
         summary = self.meta.get("about", {}).get("summary")
@@ -875,6 +1783,7 @@ class CondaRecipeCheck(object):
                     u'Found invalid URL "{}" in meta.yaml'.format(url),
                 )
 
+    @check("C2119", "C2120", "C2121")
     def check_source(self):
         """Check the source field in meta.yaml for proper formatting."""
         sources = ensure_list(self.meta.get("source", {}))
@@ -911,6 +1820,7 @@ class CondaRecipeCheck(object):
                     "Found both git_branch and git_tag in meta.yaml source field",
                 )
 
+    @check("C2122")
     def check_license_family(self):
         """Check that the license family listed in meta.yaml is valid."""
         license_family = self.meta.get("about", {}).get(
@@ -924,6 +1834,7 @@ class CondaRecipeCheck(object):
                 u'Found invalid license family "{}"'.format(license_family),
             )
 
+    @check("C2123", "C2124")
     def check_for_valid_files(self):
         """Check that the files listed in meta.yaml exist."""
         test_files = self.meta.get("test", {}).get("files", [])
@@ -951,6 +1862,7 @@ class CondaRecipeCheck(object):
                     ),
                 )
 
+    @check("C2125")
     def check_dir_content(self):
         """Check for disallowed files inside the recipe directory."""
         disallowed_extensions = (
@@ -976,6 +1888,7 @@ class CondaRecipeCheck(object):
                         u'Found disallowed file with extension "{}"'.format(filepath),
                     )
 
+    @check("C2126")
     def check_recipes_comments(self):
         """Check for default comments in conda-forge example recipe."""
         meta = os.path.join(self.recipe_dir, "meta.yaml")
@@ -1,44 +1,143 @@
 from __future__ import print_function
+import functools
 import json
 import os
+import random
 import sys
 from glob import glob
 
 import click
 import tqdm
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
 
 from conda_verify import __version__
+from conda_verify.admission import AdmissionController, Footprint, estimate_footprint
+from conda_verify.cache import ResultCache
+from conda_verify.checks import dependency_cache_counters
+from conda_verify.errors import Error, PackageError
+from conda_verify.manifest import Manifest, stat_signature
+from conda_verify.scratch import ScratchBudget
 from conda_verify.verify import Verify
-from conda_verify.utilities import DummyExecutor, render_metadata, iter_cfgs
+from conda_verify.utilities import (
+    DummyExecutor,
+    available_cpus,
+    iter_cfgs,
+    parse_size,
+    render_metadata,
+)
 
 
-def _submit_verify_recipe(path, executor, ignore):
-    futures = []
+class ByteSize(click.ParamType):
+    """A number of bytes with an optional K, M, G or T suffix."""
+
+    name = "size"
+
+    def convert(self, value, param, ctx):
+        try:
+            return parse_size(value)
+        except ValueError:
+            self.fail("{} is not a valid size".format(value), param, ctx)
+
+
+# the weight of a recipe variant when scheduling recipes and packages, which
+# are weighted by their size in bytes
+_RECIPE_VARIANT_WEIGHT = 1 << 20
+# the estimated peak memory of verifying a recipe variant
+_RECIPE_MEMORY = 1 << 26
+
+
+def _render_recipe(path):
+    """Return the rendered metadata of each variant of the recipe that isn't skipped."""
+    variants = []
     for cfg in iter_cfgs():
         meta = render_metadata(path, cfg)
         if meta.get("build", {}).get("skip", "").lower() != "true":
-            futures.append(
-                executor.submit(
-                    Verify.verify_recipe,
-                    rendered_meta=meta,
-                    recipe_dir=path,
-                    checks_to_ignore=ignore,
-                    exit_on_error=False,
-                )
-            )
-    return futures
+            variants.append(meta)
+    return variants
+
+
+def _counting_dependencies(fn, *args, **kwargs):
+    """Call fn and return its result, along with the hits and misses of the
+    dependency cache of the worker during the call."""
+    before = dependency_cache_counters()
+    result = fn(*args, **kwargs)
+    after = dependency_cache_counters()
+    return result, (after["hits"] - before["hits"], after["misses"] - before["misses"])
+
+
+def _task(fn, debug):
+    """Return fn, counting the dependency cache hits and misses in --debug mode."""
+    return functools.partial(_counting_dependencies, fn) if debug else fn
+
+
+def _submit_verify_recipe(meta, path, ignore):
+    recipe_dir, issues = Verify.verify_recipe(
+        rendered_meta=meta, recipe_dir=path, checks_to_ignore=ignore, exit_on_error=False
+    )
+    return recipe_dir, issues, True
+
+
+def _add_verify_recipe(path, variants, controller, ignore, debug):
+    for meta in variants:
+        controller.add(
+            Footprint(_RECIPE_MEMORY, 0),
+            _task(_submit_verify_recipe, debug),
+            meta,
+            path,
+            ignore,
+        )
 
 
-def _submit_verify_package(path, ignore):
-    package_issues = (path, None)
+def _schedule(jobs, schedule):
+    """Order (weight, path, variants) jobs for submission.
+
+    "size" submits the heaviest jobs first, so that a large package found
+    last doesn't run on its own after every other worker is done; "fifo"
+    keeps the order of the paths and "random" shuffles them.
+    """
+    if schedule == "size":
+        return sorted(jobs, key=lambda job: job[0], reverse=True)
+    if schedule == "random":
+        jobs = list(jobs)
+        random.shuffle(jobs)
+    return jobs
+
+
+def _submit_verify_package(
+    path,
+    ignore,
+    exit,
+    metadata_only,
+    hash_threads,
+    cache_dir,
+    cache_size,
+    scratch_dir,
+    scratch_budget,
+):
+    """Verify the package at path and return its path, its issues and whether
+    its verification completed, which it doesn't if the package couldn't be
+    read."""
     try:
-        package_issues = Verify.verify_package(
-            path_to_package=path, checks_to_ignore=ignore, exit_on_error=False
+        path, issues = Verify.verify_package(
+            path_to_package=path,
+            checks_to_ignore=ignore,
+            exit_on_error=exit,
+            metadata_only=metadata_only,
+            hash_threads=hash_threads,
+            cache_dir=cache_dir,
+            cache_size=cache_size,
+            scratch_dir=scratch_dir,
+            scratch_budget=scratch_budget,
         )
     except (KeyError, OSError) as e:
-        package_issues = (path, [str(e)])
-    return package_issues
+        return path, [str(e)], False
+    except PackageError as e:
+        error = e.args[0]
+        if isinstance(error, Error):
+            error = "[{}] {}".format(error.code, error.message)
+        issues = [error]
+    return path, issues, True
 
 
 @click.command()
@@ -47,8 +146,36 @@ def _submit_verify_package(path, ignore):
 @click.option("--exit", is_flag=True)
 @click.option("--debug", is_flag=True)
 @click.option("--out-file", nargs=1, type=click.Path())
+@click.option("--metadata-only", is_flag=True)
+@click.option("--hash-threads", nargs=1, type=click.IntRange(min=1))
+@click.option("--cache-dir", nargs=1, type=click.Path(file_okay=False))
+@click.option("--cache-size", nargs=1, type=click.IntRange(min=1))
+@click.option("--manifest", nargs=1, type=click.Path(dir_okay=False))
+@click.option("--scratch-dir", nargs=1, type=click.Path(file_okay=False))
+@click.option("--scratch-budget", nargs=1, type=ByteSize())
+@click.option(
+    "--schedule", type=click.Choice(["fifo", "size", "random"]), default="size"
+)
+@click.option("--max-memory", nargs=1, type=ByteSize())
+@click.option("--max-disk", nargs=1, type=ByteSize())
 @click.version_option(prog_name="conda-verify", version=__version__)
-def cli(paths, ignore, exit, debug, out_file):
+def cli(
+    paths,
+    ignore,
+    exit,
+    debug,
+    out_file,
+    metadata_only,
+    hash_threads,
+    cache_dir,
+    cache_size,
+    manifest,
+    scratch_dir,
+    scratch_budget,
+    schedule,
+    max_memory,
+    max_disk,
+):
     """conda-verify is a tool for validating conda packages and recipes.
 
     To validate a package:\n
@@ -61,7 +188,6 @@ def cli(paths, ignore, exit, debug, out_file):
         ignore = ignore.split(",")
 
     package_issues = {}
-    futures = []
     paths_glob = []
     for path in paths:
         glob_paths = glob(os.path.expanduser(path))
@@ -69,17 +195,116 @@ def cli(paths, ignore, exit, debug, out_file):
             print("Error: path spec %s didn't match any files" % path)
             sys.exit(1)
         paths_glob.extend(glob_paths)
-    with (DummyExecutor if debug else ProcessPoolExecutor)() as executor:
-        for path in paths_glob:
-            meta_file = os.path.join(path, "meta.yaml")
-            if os.path.isfile(meta_file):
-                futures.extend(_submit_verify_recipe(path, executor, ignore))
-            elif path.endswith((".tar.bz2", ".tar", ".conda")):
-                futures.append(executor.submit(_submit_verify_package, path, ignore))
-        for f in tqdm.tqdm(as_completed(futures), total=len(futures), leave=False):
-            path, issues = f.result()
+    signatures = {}
+    if manifest:
+        manifest = Manifest(manifest, ignore, metadata_only)
+        packages_glob = [
+            path for path in paths_glob if path.endswith((".tar.bz2", ".tar", ".conda"))
+        ]
+        for path in packages_glob:
+            signature = stat_signature(path)
+            findings = manifest.findings(path, signature)
+            if findings is None:
+                signatures[path] = signature
+            elif findings:
+                package_issues[path] = findings
+        # only packages that changed since the manifest was written are verified again
+        paths_glob = [
+            path for path in paths_glob if path not in packages_glob or path in signatures
+        ]
+        print(
+            "manifest: {} unchanged, {} changed".format(
+                len(packages_glob) - len(signatures), len(signatures)
+            ),
+            file=sys.stderr,
+        )
+    if not hash_threads:
+        # share the CPUs between the packages that are verified at the same time
+        cpus = available_cpus()
+        hash_threads = max(1, cpus // max(1, min(cpus, len(paths_glob))))
+    jobs = []
+    for path in paths_glob:
+        meta_file = os.path.join(path, "meta.yaml")
+        if os.path.isfile(meta_file):
+            variants = _render_recipe(path)
+            jobs.append((len(variants) * _RECIPE_VARIANT_WEIGHT, path, variants))
+        elif path.endswith((".tar.bz2", ".tar", ".conda")):
+            jobs.append((os.path.getsize(path), path, None))
+    if cache_dir:
+        cache = ResultCache(cache_dir, cache_size)
+        cache_counters = cache.counters()
+        cache.close()
+    manager = None
+    if scratch_budget:
+        # workers extracting packages at the same time share the budget
+        if not debug:
+            manager = Manager()
+        scratch_budget = ScratchBudget(scratch_budget, manager)
+    workers = 1 if debug else available_cpus()
+    with DummyExecutor() if debug else ProcessPoolExecutor(workers) as executor:
+        # tasks are only submitted while their estimated footprint fits in
+        # --max-memory and --max-disk
+        controller = AdmissionController(executor, workers, max_memory, max_disk)
+        for weight, path, variants in _schedule(jobs, schedule):
+            if variants is not None:
+                _add_verify_recipe(path, variants, controller, ignore, debug)
+            else:
+                if max_memory is None and max_disk is None:
+                    footprint = Footprint(0, 0)
+                else:
+                    footprint = estimate_footprint(path, metadata_only)
+                controller.add(
+                    footprint,
+                    _task(_submit_verify_package, debug),
+                    path,
+                    ignore,
+                    exit,
+                    metadata_only,
+                    hash_threads,
+                    cache_dir,
+                    cache_size,
+                    scratch_dir,
+                    scratch_budget,
+                )
+        dependency_hits = dependency_misses = 0
+        for f in tqdm.tqdm(controller.as_completed(), total=len(controller), leave=False):
+            result = f.result()
+            if debug:
+                result, (hits, misses) = result
+                dependency_hits += hits
+                dependency_misses += misses
+            path, issues, verified = result
             if issues:
                 package_issues[path] = issues
+            # packages that couldn't be read are verified again on the next run
+            if path in signatures and verified and not (exit and issues):
+                manifest.record(path, signatures[path], issues)
+            if exit and issues:
+                # the batch fails anyway, so don't start the remaining packages
+                controller.cancel()
+                break
+
+    if manager is not None:
+        manager.shutdown()
+
+    if manifest:
+        manifest.save()
+
+    if cache_dir:
+        cache = ResultCache(cache_dir, cache_size)
+        hits, misses = (
+            cache.counters()[name] - cache_counters[name] for name in ("hits", "misses")
+        )
+        cache.close()
+        print("cache: {} hits, {} misses".format(hits, misses), file=sys.stderr)
+
+    if debug:
+        print(
+            "dependency cache: {} hits, {} misses".format(
+                dependency_hits, dependency_misses
+            ),
+            file=sys.stderr,
+        )
 
     if out_file:
         with open(out_file, "w") as f:
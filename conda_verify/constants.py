@@ -135,6 +135,40 @@ DLL_TYPES = {
     0x169: "WCEMIPSV2",
 }
 
+# the e_machine of ELF files
+ELF_MACHINES = {
+    0x3: "386",
+    0x14: "PPC",
+    0x15: "PPC64",
+    0x16: "S390",
+    0x28: "ARM",
+    0x3E: "X86_64",
+    0xB7: "AARCH64",
+}
+
+# the cputype of Mach-O files
+MACHO_CPU_TYPES = {
+    0x7: "i386",
+    0x1000007: "x86_64",
+    0xC: "arm",
+    0x100000C: "arm64",
+    0x12: "ppc",
+    0x1000012: "ppc64",
+}
+
+# the object type of the ELF and Mach-O binaries of the packages of a subdir
+SUBDIR_OBJECT_TYPES = {
+    "linux-32": "ELF32 386",
+    "linux-64": "ELF64 X86_64",
+    "linux-aarch64": "ELF64 AARCH64",
+    "linux-armv6l": "ELF32 ARM",
+    "linux-armv7l": "ELF32 ARM",
+    "linux-ppc64le": "ELF64 PPC64",
+    "linux-s390x": "ELF64 S390",
+    "osx-64": "MachO-x86_64",
+    "osx-arm64": "MachO-arm64",
+}
+
 CONDA_FORGE_COMMENTS = """
 # Note: there are many handy hints in comments in this example -- remove them when you've finalized your recipe
 # Jinja variables help maintain the recipe as you'll update the version only here.
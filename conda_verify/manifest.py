@@ -0,0 +1,78 @@
+"""A manifest of the packages verified by previous runs.
+
+The manifest maps the path of each verified package to its stat signature
+(size, mtime in nanoseconds and inode) and the findings of verifying it.  A
+package whose signature hasn't changed since the previous run is not read
+again, so re-verifying a channel only costs a stat() of each package.  The
+manifest is stored as JSON and replaced atomically when it's saved.
+"""
+import json
+import os
+import tempfile
+
+from conda_verify import __version__
+from conda_verify.utilities import ensure_list
+
+
+def stat_signature(path):
+    """Return the (size, mtime_ns, inode) signature of the file at path."""
+    st = os.stat(path)
+    mtime_ns = getattr(st, "st_mtime_ns", None)
+    if mtime_ns is None:
+        mtime_ns = int(st.st_mtime * 1e9)
+    return [st.st_size, mtime_ns, st.st_ino]
+
+
+class Manifest(object):
+    """Map package paths to their stat signature and findings."""
+
+    def __init__(self, path, checks_to_ignore=None, metadata_only=False):
+        self.path = path
+        self.checks = {
+            "version": __version__,
+            "ignore": sorted(set(code for code in ensure_list(checks_to_ignore) if code)),
+            "metadata_only": bool(metadata_only),
+        }
+        self.packages = {}
+        try:
+            with open(path) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (IOError, OSError, ValueError):
+            return
+        # findings of another version or selection of checks can't be reused
+        if isinstance(manifest, dict) and manifest.get("checks") == self.checks:
+            self.packages = manifest.get("packages", {})
+
+    def findings(self, package_path, signature):
+        """Return the findings recorded for package_path, or None if the package
+        wasn't verified before or its signature changed since."""
+        entry = self.packages.get(package_path)
+        if entry is not None and entry["stat"] == signature:
+            return entry["findings"]
+        return None
+
+    def record(self, package_path, signature, findings):
+        self.packages[package_path] = {"stat": signature, "findings": findings or []}
+
+    def save(self):
+        """Write the manifest, dropping packages that no longer exist."""
+        packages = dict(
+            (package_path, entry)
+            for package_path, entry in self.packages.items()
+            if os.path.exists(package_path)
+        )
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(
+            prefix=".{}.".format(os.path.basename(self.path)), dir=directory
+        )
+        try:
+            with os.fdopen(fd, "w") as manifest_file:
+                json.dump(
+                    {"checks": self.checks, "packages": packages},
+                    manifest_file,
+                    sort_keys=True,
+                )
+            getattr(os, "replace", os.rename)(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -0,0 +1,272 @@
+"""Indexes of the paths of a package for the checks that match them.
+
+A PathIndex holds the paths of a package, normalized once, in a single
+sorted string with arrays of offsets, which takes a fraction of the memory
+of a string per path.  It answers membership and prefix queries, and looks
+up paths by extension.
+
+Rather than having every check iterate over all paths of a package, the
+paths are also scanned once.  Each path is looked up by its extension, its
+whole path, its prefix and a few suffixes that aren't extensions, and
+dispatched to the codes it may be reported for.  The first path matching
+each code is recorded, so checks report the same path they would by
+iterating over the paths themselves.
+"""
+import array
+import bisect
+import itertools
+import os
+import re
+
+from conda_verify.utilities import all_ascii
+
+
+LINK_SCRIPTS = (
+    "-post-link.sh",
+    "-pre-link.sh",
+    "-pre-unlink.sh",
+    "-post-link.bat",
+    "-pre-link.bat",
+    "-pre-unlink.bat",
+)
+
+# the characters all_ascii rejects
+_NON_ASCII = re.compile(u"[^\n\x20-\x7e]")
+
+
+def extension(path):
+    """Return the text after the last dot of the basename of path, or ""."""
+    basename = path.rpartition(os.path.sep)[2]
+    head, dot, ext = basename.rpartition(".")
+    return ext if dot else ""
+
+
+# the directories of executables, and the extensions of executables and
+# libraries, whose object type is read from their headers
+_BINARY_DIRECTORIES = ("bin", "sbin", "libexec")
+_BINARY_EXTENSIONS = frozenset(["exe", "dll", "so", "dylib"])
+
+
+def may_be_binary(path):
+    """Return whether path may be an executable or a library, going by its name."""
+    if extension(path) in _BINARY_EXTENSIONS:
+        return True
+    directory, _, name = path.rpartition(os.path.sep)
+    return ".so." in name or directory.partition(os.path.sep)[0] in _BINARY_DIRECTORIES
+
+
+class PathIndex(object):
+    """The paths of a package in order, stored compactly for the package checks.
+
+    Rather than one string per path, the paths are stored sorted in a single
+    string along with an array of their offsets, and arrays mapping between
+    their sorted and their original order.  Paths are normalized once if
+    normalize is True.  Membership and prefix queries are binary searches,
+    and the paths with a given extension are looked up without scanning
+    every path.
+    """
+
+    def __init__(self, paths, normalize=False):
+        if normalize:
+            paths = [os.path.normpath(path) for path in paths]
+        else:
+            paths = list(paths)
+        positions = sorted(range(len(paths)), key=paths.__getitem__)
+        self._buffer = "".join(paths[position] for position in positions)
+        self._offsets = array.array("I", [0])
+        offset = 0
+        for position in positions:
+            offset += len(paths[position])
+            self._offsets.append(offset)
+        self._positions = array.array("I", positions)
+        self._ranks = array.array("I", [0]) * len(paths)
+        for rank, position in enumerate(positions):
+            self._ranks[position] = rank
+        extensions = dict()
+        for position, path in enumerate(paths):
+            extensions.setdefault(extension(path), array.array("I")).append(position)
+        self._extensions = extensions
+
+    def _path(self, rank):
+        return self._buffer[self._offsets[rank]:self._offsets[rank + 1]]
+
+    def _lower_bound(self, path):
+        """Return the rank of the first path that isn't less than path."""
+        low, high = 0, len(self._positions)
+        while low < high:
+            middle = (low + high) // 2
+            if self._path(middle) < path:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __iter__(self):
+        """Iterate over the paths in their original order."""
+        for rank in self._ranks:
+            yield self._path(rank)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, path):
+        rank = self._lower_bound(path)
+        return rank < len(self._positions) and self._path(rank) == path
+
+    def first_non_ascii(self):
+        """Return the first path, in order, with a character that isn't
+        printable ascii or a newline, or None if there is no such path.
+
+        All paths are checked at once, and only searched for the first one
+        if there is such a character.
+        """
+        buffer = self._buffer
+        if all_ascii(buffer if isinstance(buffer, bytes) else buffer.encode("utf-8")):
+            return None
+        first = None
+        match = _NON_ASCII.search(buffer)
+        while match is not None:
+            rank = bisect.bisect_right(self._offsets, match.start()) - 1
+            if first is None or self._positions[rank] < self._positions[first]:
+                first = rank
+            match = _NON_ASCII.search(buffer, self._offsets[rank + 1])
+        return self._path(first)
+
+    def sorted(self):
+        """Iterate over the paths in sorted order."""
+        for rank in range(len(self._positions)):
+            yield self._path(rank)
+
+    def _in_order(self, positions):
+        return [self._path(self._ranks[position]) for position in sorted(positions)]
+
+    def with_prefix(self, *prefixes):
+        """Return the paths starting with any of the given prefixes, in order."""
+        positions = set()
+        for prefix in prefixes:
+            rank = self._lower_bound(prefix)
+            while rank < len(self._positions) and self._path(rank).startswith(prefix):
+                positions.add(self._positions[rank])
+                rank += 1
+        return self._in_order(positions)
+
+    def in_directory(self, *directories):
+        """Return the paths below any of the given directories, in order."""
+        return self.with_prefix(
+            *[directory.rstrip(os.path.sep) + os.path.sep for directory in directories]
+        )
+
+    def with_extension(self, *extensions):
+        """Return the paths with any of the given extensions, in order."""
+        return self._in_order(
+            itertools.chain.from_iterable(
+                self._extensions.get(ext, ()) for ext in extensions
+            )
+        )
+
+
+def sorted_difference(first, second):
+    """Yield the paths in just one of the sorted iterables first and second.
+
+    Each path is yielded once, in order, as (path, True) if it is only in
+    first and as (path, False) if it is only in second.
+    """
+    first, second = iter(first), iter(second)
+    a, b = next(first, None), next(second, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a < b):
+            yield a, True
+            a = _next_distinct(first, a)
+        elif a is None or b < a:
+            yield b, False
+            b = _next_distinct(second, b)
+        else:
+            a, b = _next_distinct(first, a), _next_distinct(second, b)
+
+
+def _next_distinct(paths, path):
+    following = next(paths, None)
+    while following is not None and following == path:
+        following = next(paths, None)
+    return following
+
+
+def _any_path(path):
+    return True
+
+
+def _is_link_script(path):
+    return path.endswith(LINK_SCRIPTS)
+
+
+def _is_misplaced_pyc(path):
+    return "site-packages" not in path and "distutils" not in path
+
+
+def _is_2to3_pickle(path):
+    return "lib2to3" in path
+
+
+# the (code, condition) rules of paths by extension
+_EXTENSION_RULES = {
+    "DS_Store": (("C1125", _any_path),),
+    "sh": (("C1134", _is_link_script),),
+    "bat": (("C1134", _is_link_script),),
+    "egg": (("C1135", _any_path),),
+    "pth": (("C1137", _any_path),),
+    "pyo": (("C1138", _any_path),),
+    "pyc": (("C1139", _is_misplaced_pyc),),
+    "pickle": (("C1140", _is_2to3_pickle),),
+    "so": (("C1148", _any_path),),
+    "dylib": (("C1148", _any_path),),
+    "dll": (("C1148", _any_path),),
+}
+
+# the codes of whole paths
+_PATH_CODES = {
+    "conda-meta": "C1125",
+    "conda-bld": "C1125",
+    "pkgs": "C1125",
+    "pkgs32": "C1125",
+    "envs": "C1125",
+    os.path.join("info", "package_metadata.json"): "C1126",
+    os.path.join("info", "link.json"): "C1126",
+}
+
+# the codes of paths by prefix, and by suffixes that aren't extensions
+_PREFIX_CODES = (
+    (os.path.join("bin", "easy_install"), "C1136"),
+    (os.path.join("Scripts", "easy_install"), "C1136"),
+)
+_SUFFIX_CODES = (("~", "C1125"), ("lib", "C1148"))
+_PREFIXES = tuple(prefix for prefix, _ in _PREFIX_CODES)
+_SUFFIXES = tuple(suffix for suffix, _ in _SUFFIX_CODES)
+
+SCANNED_CODES = frozenset(
+    [code for rules in _EXTENSION_RULES.values() for code, _ in rules]
+    + list(_PATH_CODES.values())
+    + [code for _, code in _PREFIX_CODES + _SUFFIX_CODES]
+)
+
+
+def scan_paths(paths):
+    """Return a dict of the first path in paths found for each scanned code."""
+    found = dict()
+    for path in paths:
+        for code, condition in _EXTENSION_RULES.get(path.rpartition(".")[2], ()):
+            if code not in found and condition(path):
+                found[code] = path
+        code = _PATH_CODES.get(path)
+        if code is not None and code not in found:
+            found[code] = path
+        if path.startswith(_PREFIXES):
+            for prefix, code in _PREFIX_CODES:
+                if code not in found and path.startswith(prefix):
+                    found[code] = path
+        if path.endswith(_SUFFIXES):
+            for suffix, code in _SUFFIX_CODES:
+                if code not in found and path.endswith(suffix):
+                    found[code] = path
+        if len(found) == len(SCANNED_CODES):
+            break
+    return found
@@ -0,0 +1,110 @@
+"""Scratch space for extracting packages that can't be streamed.
+
+Each process creates one scratch root, below the scratch directory or the
+default temporary directory, and extracts every package into a directory
+of its own below that root.  The root is removed when the process exits.
+
+A ScratchBudget limits the bytes extracted at the same time.  Its state
+lives in a multiprocessing manager when it's shared between processes, so
+that several workers extracting large packages don't fill up the volume.
+"""
+import errno
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from multiprocessing.util import Finalize
+
+
+_scratch_roots = {}
+_scratch_roots_lock = threading.Lock()
+
+
+def _remove_readonly(function, path, excinfo):
+    # extracted packages may hold read-only files and directories
+    os.chmod(os.path.dirname(path), stat.S_IRWXU)
+    if function is not os.rmdir and os.path.lexists(path) and not os.path.islink(path):
+        os.chmod(path, stat.S_IRWXU)
+    function(path)
+
+
+def rmtree(path):
+    """Remove the directory tree at path, including read-only members."""
+    try:
+        shutil.rmtree(path, onerror=_remove_readonly)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+def scratch_root(scratch_dir=None):
+    """Return the scratch root of this process below scratch_dir.
+
+    The root is created on first use, and removed when the process exits.
+    """
+    key = (os.getpid(), scratch_dir)
+    with _scratch_roots_lock:
+        if key not in _scratch_roots:
+            if scratch_dir is not None and not os.path.isdir(scratch_dir):
+                os.makedirs(scratch_dir)
+            root = tempfile.mkdtemp(prefix="conda-verify-", dir=scratch_dir)
+            Finalize(None, rmtree, args=(root,), exitpriority=0)
+            _scratch_roots[key] = root
+        return _scratch_roots[key]
+
+
+class ScratchBudget(object):
+    """The number of bytes that may be extracted at the same time.
+
+    Pass a multiprocessing manager to share the budget between processes.
+    """
+
+    def __init__(self, size, manager=None):
+        self.size = size
+        if manager is None:
+            self._condition = threading.Condition()
+            self._used = [0]
+        else:
+            self._condition = manager.Condition()
+            self._used = manager.list([0])
+
+    def reserve(self, size):
+        """Wait until size bytes fit in the budget, and reserve them.
+
+        A package larger than the whole budget waits until nothing else is
+        reserved, and is then extracted on its own.
+        """
+        with self._condition:
+            while self._used[0] and self._used[0] + size > self.size:
+                self._condition.wait()
+            self._used[0] += size
+
+    def release(self, size):
+        with self._condition:
+            self._used[0] -= size
+            self._condition.notify_all()
+
+
+class ScratchDirectory(object):
+    """A directory for one package below the scratch root of this process."""
+
+    def __init__(self, scratch_dir=None, budget=None):
+        self.name = tempfile.mkdtemp(dir=scratch_root(scratch_dir))
+        self.budget = budget
+        self._reserved = 0
+
+    def reserve(self, size):
+        """Reserve size bytes of the budget until the directory is removed."""
+        if self.budget is not None:
+            self.budget.reserve(size)
+            self._reserved += size
+
+    def cleanup(self):
+        """Remove the directory and release the budget it reserved."""
+        try:
+            rmtree(self.name)
+        finally:
+            if self._reserved:
+                self.budget.release(self._reserved)
+                self._reserved = 0
@@ -1,4 +1,7 @@
+import io
+import math
 import re
+import struct
 import sys
 from os import environ, getcwd, listdir, makedirs, rename, rmdir, unlink
 from os.path import abspath, basename, dirname, exists, isdir, isfile, join, normpath, split, islink, lexists
@@ -9,17 +12,21 @@ import jinja2
 import yaml
 from six import string_types
 from concurrent.futures import Future, Executor
+from multiprocessing import cpu_count
 from threading import Lock
 
-import future.builtins
-
-from conda_verify.constants import MAGIC_HEADERS, DLL_TYPES
+from conda_verify.constants import DLL_TYPES, ELF_MACHINES, MACHO_CPU_TYPES, MAGIC_HEADERS
 
 try:
     from functools import lru_cache
 except ImportError:
     from backports.functools_lru_cache import lru_cache
 
+try:
+    from os import sched_getaffinity
+except ImportError:
+    sched_getaffinity = None
+
 
 @lru_cache(maxsize=32)
 def yamlize(data):
@@ -121,22 +128,97 @@ def iter_cfgs():
             yield dict(platform=platform, arch=arch, python=py, numpy="1.11")
 
 
-def get_object_type(data):
-    head = data[:4]
-    if head not in MAGIC_HEADERS:
+# a DLL or exe starts with a DOS header that has the offset of its PE header,
+# e_lfanew, at _PE_POINTER.  The PE header starts with its signature, which
+# is followed by the machine type, and is only looked for in the first
+# _PE_HEADER_LIMIT bytes.
+_DOS_HEADER_SIZE = 64
+_PE_POINTER = 0x3C
+_PE_SIGNATURE = b"PE\0\0"
+_PE_HEADER_LIMIT = 4096
+# the ELF header has the class and byte order of the file at _ELF_IDENT, and
+# its e_machine at _ELF_MACHINE
+_ELF_IDENT = 4
+_ELF_MACHINE = 18
+# a universal Mach-O file has fewer than _MAX_FAT_ARCHS architectures,
+# which tells it from a Java class file with the same magic
+_MAX_FAT_ARCHS = 20
+_FAT_ARCH_SIZE = 20
+
+
+def read_object_type(fileobj):
+    """Return the object type of the file read from fileobj, or None.
+
+    Only the headers are read, in order from the current position, so
+    fileobj can be a stream.  The machine type of a DLL or exe is read from
+    the PE header e_lfanew points to, rather than from the whole first page,
+    that of an ELF file from e_machine, and that of a Mach-O file from the
+    cputype of the file or of each architecture of a universal file.
+    """
+    data = fileobj.read(_DOS_HEADER_SIZE)
+    lookup = MAGIC_HEADERS.get(data[:4])
+    if lookup is None:
         return None
-    lookup = MAGIC_HEADERS.get(head)
     if lookup == "DLL":
-        pos = data.find(b"PE\0\0")
-        if pos < 0:
+        if len(data) < _DOS_HEADER_SIZE:
             return "<no PE header found>"
-        data = future.builtins.bytes(data)
-        i = data[pos + 4] + 256 * data[pos + 5]
-        return "DLL " + DLL_TYPES.get(i)
+        pos = struct.unpack_from("<I", data, _PE_POINTER)[0]
+        end = pos + len(_PE_SIGNATURE) + 2
+        if end > _PE_HEADER_LIMIT:
+            return "<no PE header found>"
+        if end > len(data):
+            data += fileobj.read(end - len(data))
+        if len(data) < end or data[pos:pos + len(_PE_SIGNATURE)] != _PE_SIGNATURE:
+            return "<no PE header found>"
+        machine = struct.unpack_from("<H", data, pos + len(_PE_SIGNATURE))[0]
+        return "DLL " + DLL_TYPES.get(machine, "UNKNOWN")
+    elif lookup == "MachO-universal":
+        if len(data) < 8:
+            return "<no Mach-O header found>"
+        count = struct.unpack_from(">I", data, 4)[0]
+        if count >= _MAX_FAT_ARCHS:
+            return None
+        end = 8 + count * _FAT_ARCH_SIZE
+        if end > len(data):
+            data += fileobj.read(end - len(data))
+        if len(data) < end:
+            return "<no Mach-O header found>"
+        cputypes = [
+            struct.unpack_from(">I", data, 8 + i * _FAT_ARCH_SIZE)[0] for i in range(count)
+        ]
+        return "MachO-universal " + ",".join(
+            MACHO_CPU_TYPES.get(cputype, "UNKNOWN") for cputype in cputypes
+        )
     elif lookup.startswith("MachO"):
-        return lookup
+        if len(data) < 8:
+            return "<no Mach-O header found>"
+        byte_order = ">" if data[:2] == b"\xfe\xed" else "<"
+        cputype = struct.unpack_from(byte_order + "I", data, 4)[0]
+        return "MachO-" + MACHO_CPU_TYPES.get(cputype, "UNKNOWN")
     elif lookup == "ELF":
-        return "ELF" + {"\x01": "32", "\x02": "64"}.get(data[4])
+        if len(data) < _ELF_MACHINE + 2:
+            return "<no ELF header found>"
+        ident = bytearray(data[_ELF_IDENT:_ELF_IDENT + 2])
+        bits = {1: "32", 2: "64"}.get(ident[0])
+        byte_order = {1: "<", 2: ">"}.get(ident[1])
+        if bits is None or byte_order is None:
+            return "<no ELF header found>"
+        machine = struct.unpack_from(byte_order + "H", data, _ELF_MACHINE)[0]
+        return "ELF{} {}".format(bits, ELF_MACHINES.get(machine, "UNKNOWN"))
+
+
+def architectures(object_type):
+    """Return the object types of each architecture of a file of object_type."""
+    if object_type.startswith("MachO-universal "):
+        return [
+            "MachO-" + cpu for cpu in object_type[len("MachO-universal "):].split(",")
+        ]
+    return [object_type]
+
+
+def get_object_type(data):
+    """Return the object type of the file starting with data, or None."""
+    return read_object_type(io.BytesIO(data))
 
 
 def get_bad_seq(s):
@@ -146,15 +228,25 @@ def get_bad_seq(s):
     return None
 
 
+# the bytes all_ascii accepts: printable ascii, LF and, if allowed, CR
+_ASCII = bytes(bytearray([10] + list(range(32, 127))))
+_ASCII_OR_CR = _ASCII + b"\r"
+_NON_ASCII = re.compile(b"[^\n\x20-\x7e]")
+_NON_ASCII_OR_CR = re.compile(b"[^\n\r\x20-\x7e]")
+
+
+def first_non_ascii(data, allow_CR=False):
+    """Return the offset of the first byte of data that isn't printable ascii
+    or a newline, or None if there is no such byte."""
+    # deleting the accepted bytes is much faster than searching for the
+    # others, which is only done once some are known to be there
+    if not data.translate(None, _ASCII_OR_CR if allow_CR else _ASCII):
+        return None
+    return (_NON_ASCII_OR_CR if allow_CR else _NON_ASCII).search(data).start()
+
+
 def all_ascii(data, allow_CR=False):
-    newline = [10]  # LF
-    if allow_CR:
-        newline.append(13)  # CR
-    for c in data:
-        n = ord(c) if sys.version_info[0] == 2 else c
-        if not (n in newline or 32 <= n < 127):
-            return False
-    return True
+    return first_non_ascii(data, allow_CR) is None
 
 
 def ensure_list(argument):
@@ -162,9 +254,35 @@ def ensure_list(argument):
         return argument
     elif isinstance(argument, string_types):
         return argument.split(",")
+    elif isinstance(argument, (tuple, set, frozenset)):
+        return list(argument)
     return [argument]
 
 
+_SIZE_SUFFIXES = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(size):
+    """Parse a number of bytes with an optional K, M, G or T suffix, such as 512M."""
+    size = size.strip().upper()
+    if size.endswith("B"):
+        size = size[:-1]
+    suffix = size[-1:] if size[-1:] in _SIZE_SUFFIXES else ""
+    number = float(size[: len(size) - len(suffix)]) * _SIZE_SUFFIXES[suffix]
+    if number < 0:
+        raise ValueError("size can't be negative: {}".format(size))
+    if math.isinf(number) or math.isnan(number):
+        raise ValueError("size must be finite: {}".format(size))
+    return int(number)
+
+
+def available_cpus():
+    """Return the number of CPUs this process is allowed to run on."""
+    if sched_getaffinity is not None:
+        return len(sched_getaffinity(0))
+    return cpu_count()
+
+
 def fullmatch(regex, string, flags=0):
     """Emulate python-3.4 re.fullmatch().
 
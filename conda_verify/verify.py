@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 
-from conda_verify.checks import CondaPackageCheck, CondaRecipeCheck
-from conda_verify.errors import PackageError, RecipeError
+from conda_verify.cache import ResultCache
+from conda_verify.checks import (
+    CondaPackageCheck,
+    CondaRecipeCheck,
+    registered_checks,
+    required_inputs,
+)
+from conda_verify.errors import Error, PackageError, RecipeError
 from conda_verify.utilities import ensure_list
 from logging import getLogger
 
@@ -12,13 +18,29 @@ class Verify(object):
 
     @staticmethod
     def verify_package(
-        path_to_package=None, checks_to_ignore=None, exit_on_error=False, **kw
+        path_to_package=None,
+        checks_to_ignore=None,
+        exit_on_error=False,
+        metadata_only=False,
+        hash_threads=None,
+        cache_dir=None,
+        cache_size=None,
+        scratch_dir=None,
+        scratch_budget=None,
+        **kw
     ):
         """Run all package checks in order to verify a conda package.
         checks_to_ignore should be a list, tuple, or set of codes, such as ['C1102', 'C1104'].
-        Codes are listed in readme.md.  Package codes follow 1xxx, recipe codes follow 2xxx."""
-        package_check = CondaPackageCheck(path_to_package)
-
+        Codes are listed in readme.md.  Package codes follow 1xxx, recipe codes follow 2xxx.
+        If metadata_only is True, only the checks of info/index.json, info/files and
+        info/has_prefix are run, and the rest of the package isn't read.
+        hash_threads is the number of threads used to hash package files; it defaults
+        to the number of available CPUs.
+        If cache_dir is given, results are cached there by package contents, and a
+        package found in the cache isn't read again.  cache_size is the number of
+        results kept in the cache.
+        Packages that can't be streamed are extracted below scratch_dir, reserving
+        their size from scratch_budget, a conda_verify.scratch.ScratchBudget."""
         if ("ignore_scripts" in kw and kw["ignore_scripts"]) or (
             "run_scripts" in kw and kw["run_scripts"]
         ):
@@ -28,26 +50,91 @@ class Verify(object):
                 "list of codes, documented at https://github.com/conda/conda-verify#checks"
             )
 
-        # collect all CondaPackageCheck methods that start with the word 'check'
-        # this should later be a decorator that is placed on each check
-        checks_to_display = []
-        for method in dir(package_check):
-            if method.startswith("check"):
-                # runs the check
-                #  TODO: should have a way to skip checks if a check's codes are all ignored
-                check = getattr(package_check, method)()
-                if check is not None and check.code not in ensure_list(
-                    checks_to_ignore
-                ):
-                    checks_to_display.append(check)
+        package_options = dict(
+            metadata_only=metadata_only,
+            hash_threads=hash_threads,
+            scratch_dir=scratch_dir,
+            scratch_budget=scratch_budget,
+        )
+        if not cache_dir:
+            checks_to_display = Verify._run_package_checks(
+                path_to_package, checks_to_ignore, exit_on_error, **package_options
+            )
+        else:
+            cache = ResultCache(cache_dir, cache_size)
+            try:
+                cache_key = cache.key(path_to_package, checks_to_ignore, metadata_only)
+                cached = cache.get(cache_key)
+                if cached is None:
+                    # with exit_on_error, only a package without findings has
+                    # been checked completely, so nothing else is cached
+                    checks_to_display = Verify._run_package_checks(
+                        path_to_package, checks_to_ignore, exit_on_error, **package_options
+                    )
+                    cache.put(cache_key, [c[1:] for c in checks_to_display])
+                else:
+                    checks_to_display = [Error(path_to_package, *c) for c in cached]
+            finally:
+                cache.close()
 
         if checks_to_display and exit_on_error:
-            raise PackageError(check)
+            raise PackageError(checks_to_display[0])
         return (
             path_to_package,
             sorted(["[{}] {}".format(*c[1:]) for c in checks_to_display]),
         )
 
+    @staticmethod
+    def _run_package_checks(
+        path_to_package, checks_to_ignore, exit_on_error, **package_options
+    ):
+        """Run the package checks and return the errors that aren't ignored.
+
+        Checks whose codes are all ignored aren't run, and the parts of the
+        package that only they use aren't read.  With exit_on_error,
+        PackageError is raised on the first error.  The metadata checks that
+        don't read the payload are then run as soon as the info/ files have
+        been read, and errors found while the package is streamed stop
+        reading it right away."""
+        ignored = set(ensure_list(checks_to_ignore))
+        checks_to_run = registered_checks(
+            CondaPackageCheck, ignored, package_options.get("metadata_only")
+        )
+        early_checks = [
+            method
+            for method in checks_to_run
+            if getattr(CondaPackageCheck, method).metadata
+            and not getattr(CondaPackageCheck, method).payload
+        ]
+
+        def raise_error(check):
+            if check.code not in ignored:
+                raise PackageError(check)
+
+        def run_early_checks(package_check):
+            for method in early_checks:
+                check = getattr(package_check, method)()
+                if check is not None:
+                    raise_error(check)
+
+        # only the parts of the package used by the checks to run are read
+        package_options["inputs"] = required_inputs(CondaPackageCheck, checks_to_run)
+        if exit_on_error:
+            package_options.update(on_metadata=run_early_checks, on_error=raise_error)
+        package_check = CondaPackageCheck(path_to_package, **package_options)
+
+        with package_check:
+            checks_to_display = []
+            for method in checks_to_run:
+                if exit_on_error and method in early_checks:
+                    continue
+                check = getattr(package_check, method)()
+                if check is not None and check.code not in ignored:
+                    if exit_on_error:
+                        raise PackageError(check)
+                    checks_to_display.append(check)
+        return checks_to_display
+
     @staticmethod
     def verify_recipe(
         rendered_meta=None,
@@ -70,10 +157,11 @@ class Verify(object):
                 "list of codes, documented at https://github.com/conda/conda-verify#checks"
             )
 
+        ignored = set(ensure_list(checks_to_ignore))
         checks_to_display = []
-        for method in (_ for _ in dir(recipe_check) if _.startswith("check_")):
+        for method in registered_checks(CondaRecipeCheck, ignored):
             check = getattr(recipe_check, method)()
-            if check and check.code not in ensure_list(checks_to_ignore):
+            if check and check.code not in ignored:
                 checks_to_display.append(check)
 
         if checks_to_display and exit_on_error:
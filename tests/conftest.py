@@ -0,0 +1,34 @@
+import io
+import json
+import tarfile
+
+import pytest
+
+
+def _write_package(tmpdir, index, members, filename=None):
+    """Write a package with info/index.json and the given (name, contents)
+    members to tmpdir, and return its path.
+
+    contents is the bytes of a regular file, or a (type, linkname) pair for a
+    link.  The package is named after index unless filename is given, and
+    compressed with bzip2 unless filename ends with .tar.
+    """
+    if filename is None:
+        filename = '{name}-{version}-{build}.tar.bz2'.format(**index)
+    package = str(tmpdir.join(filename))
+    mode = 'w' if filename.endswith('.tar') else 'w:bz2'
+    with tarfile.open(package, mode) as tar:
+        for name, contents in [('info/index.json', json.dumps(index).encode())] + members:
+            member = tarfile.TarInfo(name)
+            if isinstance(contents, tuple):
+                member.type, member.linkname = contents
+                tar.addfile(member)
+            else:
+                member.size = len(contents)
+                tar.addfile(member, io.BytesIO(contents))
+    return package
+
+
+@pytest.fixture
+def write_package():
+    return _write_package
@@ -1,10 +1,12 @@
 import os
+import shutil
 
 from click.testing import CliRunner
 import pytest
 
-from conda_verify.cli import cli
-from conda_verify import __version__
+from conda_verify.cli import _schedule, cli
+from conda_verify import __version__, checks
+from conda_verify.verify import Verify
 
 
 @pytest.fixture
@@ -36,3 +38,154 @@ def test_cli_version():
     runner = CliRunner()
     result = runner.invoke(cli, ['--version'])
     assert 'conda-verify, version {}' .format(__version__) in result.output
+
+
+def test_package_cli_metadata_only(package_dir):
+    package = os.path.join(package_dir, 'testfile-0.0.2-py36_0.tar.bz2')
+    runner = CliRunner()
+    result = runner.invoke(cli, [package, '--metadata-only'])
+    assert not result.exception
+    assert 'C1116' in result.output
+
+
+def test_package_cli_hash_threads(package_dir):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+    runner = CliRunner()
+    result = runner.invoke(cli, [package, '--hash-threads', '2'])
+    assert not result.exception
+    assert 'C1146' in result.output
+
+
+def test_package_cli_cache(package_dir, tmpdir):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+    cache_dir = str(tmpdir.join('cache'))
+    runner = CliRunner()
+    result = runner.invoke(cli, [package, '--cache-dir', cache_dir, '--debug'])
+    assert not result.exception
+    assert 'cache: 0 hits, 1 misses' in result.output
+    assert 'C1146' in result.output
+
+    result = runner.invoke(cli, [package, '--cache-dir', cache_dir, '--debug'])
+    assert not result.exception
+    assert 'cache: 1 hits, 0 misses' in result.output
+    assert 'C1146' in result.output
+
+
+def test_package_cli_dependency_cache(package_dir, tmpdir):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+    copy = str(tmpdir.join('testfile-0.0.30-py27_0.tar.bz2'))
+    shutil.copy(package, copy)
+    checks.split_dependency.cache_clear()
+    runner = CliRunner()
+    result = runner.invoke(cli, [package, copy, '--debug'])
+    assert not result.exception
+    assert 'dependency cache: 1 hits, 1 misses' in result.output
+
+    result = runner.invoke(cli, [package, copy])
+    assert not result.exception
+    assert 'dependency cache' not in result.output
+
+
+def test_package_cli_manifest(package_dir, tmpdir):
+    package = str(tmpdir.join('testfile-0.0.43-py36_0.tar.bz2'))
+    shutil.copy(os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2'), package)
+    manifest = str(tmpdir.join('manifest.json'))
+    runner = CliRunner()
+    result = runner.invoke(cli, [package, '--manifest', manifest, '--debug'])
+    assert not result.exception
+    assert 'manifest: 0 unchanged, 1 changed' in result.output
+    assert 'C1146' in result.output
+
+    result = runner.invoke(cli, [package, '--manifest', manifest, '--debug'])
+    assert not result.exception
+    assert 'manifest: 1 unchanged, 0 changed' in result.output
+    assert 'C1146' in result.output
+
+    stat = os.stat(package)
+    os.utime(package, (stat.st_atime, stat.st_mtime + 1))
+    result = runner.invoke(cli, [package, '--manifest', manifest, '--debug'])
+    assert not result.exception
+    assert 'manifest: 0 unchanged, 1 changed' in result.output
+    assert 'C1146' in result.output
+
+
+def test_package_cli_manifest_skips_unreadable_package(package_dir, tmpdir, monkeypatch):
+    package = str(tmpdir.join('testfile-0.0.43-py36_0.tar.bz2'))
+    shutil.copy(os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2'), package)
+    manifest = str(tmpdir.join('manifest.json'))
+
+    def verify_package(path_to_package, **kwargs):
+        raise OSError(5, 'Input/output error')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Verify, 'verify_package', staticmethod(verify_package))
+        result = CliRunner().invoke(cli, [package, '--manifest', manifest, '--debug'])
+    assert not result.exception
+    assert 'Input/output error' in result.output
+
+    result = CliRunner().invoke(cli, [package, '--manifest', manifest, '--debug'])
+    assert not result.exception
+    assert 'manifest: 0 unchanged, 1 changed' in result.output
+    assert 'Input/output error' not in result.output
+    assert 'C1146' in result.output
+
+
+def test_package_cli_exit(package_dir):
+    package = os.path.join(package_dir, 'testfile-0.0.3-py36_0.tar.bz2')
+    runner = CliRunner()
+    result = runner.invoke(cli, [package, '--exit', '--debug'])
+    assert result.exit_code == 1
+    assert 'C1102' in result.output
+    assert 'C1120' not in result.output
+
+
+@pytest.mark.parametrize('debug', [False, True])
+def test_package_cli_scratch_budget(package_dir, tmpdir, monkeypatch, debug):
+    # extract the packages, in the worker processes too unless debugging
+    monkeypatch.setattr(checks, 'can_stream', lambda path: False)
+    packages = [os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2'),
+                os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')]
+    scratch_dir = str(tmpdir.join('scratch'))
+    runner = CliRunner()
+    result = runner.invoke(cli, packages + ['--scratch-dir', scratch_dir, '--scratch-budget', '1M']
+                           + (['--debug'] if debug else []))
+    assert not result.exception
+    assert 'C1146' in result.output
+
+    # the scratch roots are only created to extract packages, and are left empty
+    assert os.path.isdir(scratch_dir)
+    for root in os.listdir(scratch_dir):
+        assert os.listdir(os.path.join(scratch_dir, root)) == []
+    if debug:
+        assert len(os.listdir(scratch_dir)) == 1
+
+    result = runner.invoke(cli, [packages[0], '--scratch-budget', 'lots'])
+    assert result.exit_code == 2
+
+
+def test_schedule_largest_first():
+    jobs = [(10, 'small', None), (30, 'large', None), (20, 'medium', ['variant'])]
+    assert [job[1] for job in _schedule(jobs, 'size')] == ['large', 'medium', 'small']
+    assert _schedule(jobs, 'fifo') == jobs
+    assert sorted(_schedule(jobs, 'random')) == sorted(jobs)
+
+
+@pytest.mark.parametrize('schedule', ['fifo', 'size', 'random'])
+def test_package_cli_schedule(package_dir, schedule):
+    packages = [os.path.join(package_dir, 'testfile-0.0.{}-py36_0.tar.bz2'.format(version))
+                for version in (43, 44)]
+    runner = CliRunner()
+    result = runner.invoke(cli, packages + ['--schedule', schedule, '--debug'])
+    assert not result.exception
+    assert 'C1146' in result.output
+    assert 'C1147' in result.output
+
+
+def test_package_cli_admission_limits(package_dir):
+    packages = [os.path.join(package_dir, 'testfile-0.0.{}-py36_0.tar.bz2'.format(version))
+                for version in (43, 44)]
+    runner = CliRunner()
+    result = runner.invoke(cli, packages + ['--max-memory', '1', '--max-disk', '1G'])
+    assert not result.exception
+    assert 'C1146' in result.output
+    assert 'C1147' in result.output
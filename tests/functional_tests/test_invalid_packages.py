@@ -1,7 +1,15 @@
+import hashlib
+import json
 import os
+import struct
+import tarfile
+import threading
 
+import conda_package_handling.api
 import pytest
 
+from conda_verify import checks, verify
+from conda_verify.checks import CondaPackageCheck
 from conda_verify.errors import PackageError
 from conda_verify.verify import Verify
 
@@ -291,6 +299,106 @@ def test_invalid_windows_dll(package_dir, verifier):
     assert '[C1145] Found file "bin{}testfile.dll" with object type "None" but with arch "x86_64"'.format(os.path.sep) in errors
 
 
+def windows_package(machines):
+    """Return the index and members of a win-64 package with a DLL of each machine type."""
+    index = {'name': 'testfile', 'version': '0.0.1', 'build': 'py36_0', 'arch': 'x86_64',
+             'platform': 'win', 'subdir': 'win-64'}
+    members = []
+    for i, machine in enumerate(machines):
+        dll = bytearray(8192)
+        dll[:4] = b'MZ\x90\x00'
+        struct.pack_into('<I', dll, 0x3C, 0x80)
+        struct.pack_into('<4sH', dll, 0x80, b'PE\0\0', machine)
+        members.append(('Library/bin/lib{}.dll'.format(i), bytes(dll)))
+    members.append(('info/files', '\n'.join(name for name, _ in members).encode()))
+    return index, members
+
+
+@pytest.mark.parametrize('extract', [False, True])
+@pytest.mark.parametrize('hash_threads', [1, 4])
+@pytest.mark.parametrize('inputs', [(checks.INDEX,), (checks.INDEX, checks.MEMBERS),
+                                    (checks.INDEX, checks.MEMBERS, checks.HEADERS),
+                                    checks.ALL_INPUTS])
+def test_windows_dll_machine(tmpdir, write_package, extract, hash_threads, inputs):
+    package = write_package(tmpdir, *windows_package([0x8664] * 5 + [0x14C, 0x8664, 0x14C]))
+
+    with CondaPackageCheck(package, extract=extract, hash_threads=hash_threads, inputs=inputs,
+                           scratch_dir=str(tmpdir)) as package_check:
+        error = package_check.check_windows_arch()
+
+    assert error.code == 'C1145'
+    assert error.message == ('Found file "{}" with object type "DLL I386" but with arch '
+                             '"x86_64"'.format(os.path.join('Library', 'bin', 'lib5.dll')))
+
+
+def elf_binary(machine):
+    data = bytearray(8192)
+    data[:6] = b'\x7fELF\x02\x01'
+    struct.pack_into('<H', data, 18, machine)
+    return bytes(data)
+
+
+def macho_binary(*cputypes):
+    if len(cputypes) == 1:
+        return b'\xcf\xfa\xed\xfe' + struct.pack('<I', cputypes[0]) + bytes(bytearray(8184))
+    return (b'\xca\xfe\xba\xbe' + struct.pack('>I', len(cputypes))
+            + b''.join(struct.pack('>I16x', cputype) for cputype in cputypes))
+
+
+def binary_package(subdir, files):
+    """Return the index and members of a package of subdir with the given (path, contents) files."""
+    index = {'name': 'testfile', 'version': '0.0.1', 'build': '0', 'subdir': subdir,
+             'platform': subdir.split('-')[0]}
+    return index, [('info/files', '\n'.join(path for path, _ in files).encode())] + files
+
+
+@pytest.mark.parametrize('extract', [False, True])
+@pytest.mark.parametrize('hash_threads', [1, 4])
+@pytest.mark.parametrize('inputs', [(checks.INDEX,), (checks.INDEX, checks.MEMBERS),
+                                    (checks.INDEX, checks.MEMBERS, checks.HEADERS),
+                                    checks.ALL_INPUTS])
+def test_binary_arch(tmpdir, write_package, extract, hash_threads, inputs):
+    x86_64, aarch64 = 0x3E, 0xB7
+    files = [('bin/tool', elf_binary(x86_64)), ('bin/script', b'#!/bin/sh\n'),
+             ('lib/libz.so.1', elf_binary(x86_64)), ('lib/libzstd.so', elf_binary(x86_64)),
+             ('lib/libtool.dylib', macho_binary(0x100000C)),
+             ('share/firmware.bin', elf_binary(aarch64)),
+             ('lib/libbz2.so', elf_binary(aarch64)), ('bin/other', elf_binary(aarch64))]
+    package = write_package(tmpdir, *binary_package('linux-64', files))
+
+    with CondaPackageCheck(package, extract=extract, hash_threads=hash_threads, inputs=inputs,
+                           scratch_dir=str(tmpdir)) as package_check:
+        error = package_check.check_binary_arch()
+
+    assert error.code == 'C1149'
+    assert error.message == ('Found binary "{}" with object type "ELF64 AARCH64" but with subdir '
+                             '"linux-64"'.format(os.path.join('lib', 'libbz2.so')))
+
+
+@pytest.mark.parametrize('extract', [False, True])
+def test_macho_binary_arch(tmpdir, write_package, extract):
+    x86_64, arm64 = 0x1000007, 0x100000C
+    files = [('bin/tool', macho_binary(x86_64, arm64)), ('lib/libz.dylib', macho_binary(arm64)),
+             ('lib/libzstd.1.dylib', macho_binary(x86_64)), ('lib/libbz2.so', elf_binary(0x3E))]
+    package = write_package(tmpdir, *binary_package('osx-arm64', files))
+
+    with CondaPackageCheck(package, extract=extract, scratch_dir=str(tmpdir)) as package_check:
+        error = package_check.check_binary_arch()
+
+    assert error.code == 'C1150'
+    assert error.message == ('Found binary "{}" with object type "MachO-x86_64" but with subdir '
+                             '"osx-arm64"'.format(os.path.join('lib', 'libzstd.1.dylib')))
+
+
+@pytest.mark.parametrize('subdir', ['linux-aarch64', 'win-64', 'noarch', 'linux-riscv64'])
+def test_binary_arch_matches_subdir(tmpdir, write_package, subdir):
+    files = [('bin/tool', elf_binary(0xB7)), ('lib/libz.so', elf_binary(0xB7))]
+    package = write_package(tmpdir, *binary_package(subdir, files))
+
+    with CondaPackageCheck(package) as package_check:
+        assert package_check.check_binary_arch() is None
+
+
 def test_invalid_easy_install_file(package_dir, verifier):
     package = os.path.join(package_dir, 'testfile-0.0.31-py27_0.tar.bz2')
 
@@ -309,7 +417,8 @@ def test_non_ascii_path(package_dir, verifier):
         verifier.verify_package(path_to_package=package, exit_on_error=True)
     package, errors = verifier.verify_package(path_to_package=package, exit_on_error=False)
 
-    assert '[C1118] Found archive member names containing non-ascii characters' in errors
+    assert ('[C1118] Found archive member names containing non-ascii characters: '
+            '{}'.format(os.path.join('info', u'\u20a9.txt'))) in errors
 
 
 def test_ascii_in_files_file(package_dir, verifier):
@@ -319,7 +428,8 @@ def test_ascii_in_files_file(package_dir, verifier):
         verifier.verify_package(path_to_package=package, exit_on_error=True)
     package, errors = verifier.verify_package(path_to_package=package, exit_on_error=False)
 
-    assert any('[C1119]' in e for e in errors)
+    assert ('[C1119] Found filenames in info/files containing non-ascii characters, '
+            'first on line 1') in errors
 
 
 def test_missing_depends_key(package_dir, verifier):
@@ -506,3 +616,269 @@ def test_invalid_noarch_files(package_dir, verifier):
     package, errors = verifier.verify_package(path_to_package=package, exit_on_error=False)
 
     assert '[C1148] Found architecture specific file "bin{}testfile.dll" in package.'.format(os.path.sep) in errors
+
+
+@pytest.mark.parametrize('package', [
+    'testfile-0.0.5-py36_0.tar.bz2',
+    'testfile-0.0.27-py27_0.tar.bz2',
+    'testfile-0.0.43-py36_0.tar.bz2',
+    'testfile-0.0.44-py36_0.tar.bz2',
+])
+def test_streamed_package_matches_extracted_package(package_dir, package):
+    def run_checks(package_check):
+        return sorted(str(check) for check in (
+            getattr(package_check, method)()
+            for method in dir(package_check) if method.startswith('check')
+        ) if check is not None)
+
+    package = os.path.join(package_dir, package)
+    streamed = CondaPackageCheck(package)
+    extracted = CondaPackageCheck(package, extract=True)
+
+    assert streamed.tmpdir is None
+    assert extracted.tmpdir is not None
+    assert run_checks(streamed) == run_checks(extracted)
+
+
+def test_metadata_only_runs_metadata_checks(package_dir, verifier):
+    package = os.path.join(package_dir, 'testfile-0.0.12-py36_0.tar.bz2')
+
+    package, errors = verifier.verify_package(path_to_package=package, metadata_only=True)
+
+    assert '[C1129] Found filename "bin/testfile" in info/has_prefix not included in archive' in errors
+
+
+def test_metadata_only_skips_payload_checks(package_dir, verifier):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+
+    package, errors = verifier.verify_package(path_to_package=package, metadata_only=True)
+
+    assert not any('[C1146]' in e for e in errors)
+
+
+def test_invalid_file_hash_compared_while_streaming(package_dir, tmpdir, monkeypatch):
+    pytest.importorskip('zstandard')
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+    conda_package_handling.api.transmute(package, '.conda', str(tmpdir))
+    package = os.path.join(str(tmpdir), 'testfile-0.0.43-py36_0.conda')
+    member = os.path.join('lib', 'python3.6', 'site-packages', 'test', '__main__.py')
+
+    def sha256_checksum(fd):
+        pytest.fail('{} was read back for hashing'.format(fd.name))
+
+    monkeypatch.setattr(checks, 'sha256_checksum', sha256_checksum)
+    package_check = CondaPackageCheck(package)
+    assert package_check.archive_members
+    assert package_check._stream_compared[member].code == 'C1146'
+
+    error = package_check.check_package_hashes_and_size()
+    assert error.code == 'C1146'
+    assert member in error.message
+
+
+@pytest.mark.parametrize('inputs', [(checks.INDEX,), (checks.INDEX, checks.MEMBERS)])
+@pytest.mark.parametrize('conda_format', [False, True])
+def test_invalid_file_hash_without_hashes_input(package_dir, tmpdir, inputs, conda_format):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+    if conda_format:
+        pytest.importorskip('zstandard')
+        conda_package_handling.api.transmute(package, '.conda', str(tmpdir))
+        package = os.path.join(str(tmpdir), 'testfile-0.0.43-py36_0.conda')
+
+    with CondaPackageCheck(package, inputs=inputs) as package_check:
+        error = package_check.check_package_hashes_and_size()
+
+    assert error.code == 'C1146'
+
+
+@pytest.mark.parametrize('access_paths_json', [False, True])
+def test_paths_json_after_has_prefix_without_paths_json_input(tmpdir, write_package,
+                                                              access_paths_json):
+    index = {'name': 'testfile', 'version': '0.0.1', 'build': 'py36_0', 'platform': 'linux'}
+    paths = {'paths': [{'_path': 'lib/a.txt', 'sha256': 'bad', 'size_in_bytes': 8}],
+             'paths_version': 1}
+    package = write_package(tmpdir, index, [
+        ('info/files', b'lib/a.txt'),
+        ('info/has_prefix', b'/opt/anaconda1anaconda2anaconda3 text lib/a.txt'),
+        ('info/paths.json', json.dumps(paths).encode()),
+        ('lib/a.txt', b'testfile'),
+    ])
+
+    with CondaPackageCheck(package, inputs=[checks.INDEX]) as package_check:
+        if access_paths_json:
+            assert 'lib/a.txt' in package_check.paths_json_path
+        error = package_check.check_package_hashes_and_size()
+
+    assert error.code == 'C1146'
+
+
+def package_with_invalid_hashes(count=8):
+    contents = [('lib/file{}.txt'.format(i), b'x' * (i + 1) * 4096) for i in range(count)]
+    paths = [{'_path': name, 'sha256': 'bad', 'size_in_bytes': len(data)}
+             for name, data in contents]
+    index = {'name': 'testfile', 'version': '0.0.1', 'build': 'py36_0', 'platform': 'linux'}
+    info = [
+        ('info/files', '\n'.join(name for name, _ in contents).encode()),
+        ('info/paths.json', json.dumps({'paths': paths, 'paths_version': 1}).encode()),
+    ]
+    return index, info + contents
+
+
+@pytest.mark.parametrize('extract', [False, True])
+def test_first_invalid_file_hash_with_hash_threads(tmpdir, write_package, extract):
+    # the largest file is last in the archive, so it is hashed first on a pool
+    package = write_package(tmpdir, *package_with_invalid_hashes())
+
+    serial_check = CondaPackageCheck(package, extract=extract, hash_threads=1)
+    threaded_check = CondaPackageCheck(package, extract=extract, hash_threads=4)
+    error = serial_check.check_package_hashes_and_size()
+
+    assert error.code == 'C1146'
+    assert error == threaded_check.check_package_hashes_and_size()
+    if not extract:
+        assert 'lib{}file0.txt'.format(os.path.sep) in error.message
+
+
+def test_large_members_hashed_off_reading_thread(tmpdir, write_package, monkeypatch):
+    index, members = package_with_invalid_hashes()
+    threads = []
+    hash_block = checks._hash_block
+
+    def _hash_block(hash_impl, block):
+        threads.append(threading.current_thread())
+        return hash_block(hash_impl, block)
+
+    monkeypatch.setattr(checks, '_HASH_QUEUE_MEMBER_SIZE', 16384)
+    monkeypatch.setattr(checks, '_MAX_BLOCK_SIZE', 4096)
+    monkeypatch.setattr(checks, '_hash_block', _hash_block)
+    package_check = CondaPackageCheck(write_package(tmpdir, index, members), hash_threads=4)
+
+    assert threads and threading.current_thread() not in threads
+    for name, data in members:
+        if name.startswith('lib'):
+            assert package_check._stream_digests[os.path.normpath(name)] == (
+                len(data), hashlib.sha256(data).hexdigest())
+    assert package_check.check_package_hashes_and_size().code == 'C1146'
+
+
+def test_cached_results_are_reused(package_dir, verifier, tmpdir, monkeypatch):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+    cache_dir = str(tmpdir.join('cache'))
+    path, findings = verifier.verify_package(path_to_package=package, cache_dir=cache_dir)
+    assert any('[C1146]' in finding for finding in findings)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('package was read again')
+    monkeypatch.setattr(verify, 'CondaPackageCheck', fail)
+    assert verifier.verify_package(path_to_package=package, cache_dir=cache_dir) == (path, findings)
+    with pytest.raises(PackageError):
+        verifier.verify_package(path_to_package=package, cache_dir=cache_dir, exit_on_error=True)
+
+
+def test_exit_on_error_stops_reading_at_first_invalid_hash(tmpdir, write_package, verifier,
+                                                           monkeypatch):
+    package = write_package(tmpdir, *package_with_invalid_hashes())
+    recorded = []
+    record_digest = CondaPackageCheck._record_digest
+
+    def _record_digest(self, name, size, sha256_digest):
+        recorded.append(name)
+        record_digest(self, name, size, sha256_digest)
+
+    monkeypatch.setattr(CondaPackageCheck, '_record_digest', _record_digest)
+    with pytest.raises(PackageError) as excinfo:
+        verifier.verify_package(path_to_package=package, exit_on_error=True, hash_threads=1,
+                                checks_to_ignore=['C1112', 'C1115'])
+    assert excinfo.value.args[0].code == 'C1146'
+    assert recorded[-1] == os.path.join('lib', 'file0.txt')
+    assert os.path.join('lib', 'file1.txt') not in recorded
+
+
+def test_exit_on_error_checks_metadata_before_payload(package_dir, verifier, tmpdir, monkeypatch):
+    pytest.importorskip('zstandard')
+    package = os.path.join(package_dir, 'testfile-0.0.41-py36_0.tar.bz2')
+    conda_package_handling.api.transmute(package, '.conda', str(tmpdir))
+    package = os.path.join(str(tmpdir), 'testfile-0.0.41-py36_0.conda')
+
+    def _read_payload(self):
+        pytest.fail('payload was read')
+
+    monkeypatch.setattr(CondaPackageCheck, '_read_payload', _read_payload)
+    with pytest.raises(PackageError) as excinfo:
+        verifier.verify_package(path_to_package=package, exit_on_error=True)
+    assert excinfo.value.args[0].code == 'C1112'
+
+
+def test_exit_on_error_ignored_codes(package_dir, verifier):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+
+    package, errors = verifier.verify_package(path_to_package=package, exit_on_error=True,
+                                              checks_to_ignore=['C1146'])
+
+    assert errors == []
+
+
+def package_with_links(hardlink=True):
+    index = {'name': 'testfile', 'version': '0.0.1', 'build': 'py36_0', 'platform': 'linux'}
+    if hardlink:
+        link = (tarfile.LNKTYPE, 'lib/a.txt')
+    else:
+        link = (tarfile.SYMTYPE, 'a.txt')
+    return index, [('info/files', b'lib/a.txt\nlib/b.txt\nlib/c.txt'), ('lib/a.txt', b'testfile'),
+                   ('lib/b.txt', link), ('lib/c.txt', (tarfile.SYMTYPE, 'a.txt'))]
+
+
+@pytest.mark.parametrize('extract', [False, True])
+def test_hardlink_in_package(tmpdir, write_package, extract):
+    package_check = CondaPackageCheck(write_package(tmpdir, *package_with_links()),
+                                      extract=extract)
+
+    error = package_check.check_for_hardlinks()
+
+    assert error.code == 'C1124'
+    if not extract:
+        assert error.message == 'Found hardlink {} in tar archive'.format(
+            os.path.join('lib', 'b.txt'))
+    assert package_check.check_files_file_for_validity() is None
+
+
+@pytest.mark.parametrize('extract', [False, True])
+def test_symlinks_are_not_hardlinks(tmpdir, write_package, extract):
+    package_check = CondaPackageCheck(write_package(tmpdir, *package_with_links(hardlink=False)),
+                                      extract=extract)
+
+    assert package_check.check_for_hardlinks() is None
+    assert package_check._entry(os.path.join('lib', 'c.txt')).type == 'symlink'
+    assert package_check._resolve_link(os.path.join('lib', 'c.txt')) == os.path.join('lib', 'a.txt')
+
+
+@pytest.mark.parametrize('hash_threads', [1, 4])
+def test_ignored_hash_check_skips_hashing(package_dir, verifier, monkeypatch, hash_threads):
+    package = os.path.join(package_dir, 'testfile-0.0.43-py36_0.tar.bz2')
+
+    def fail(*args, **kwargs):
+        pytest.fail('package files were hashed')
+
+    monkeypatch.setattr(checks, '_update_hash', fail)
+    monkeypatch.setattr(checks, '_hash_members', fail)
+    monkeypatch.setattr(checks, '_hash_block', fail)
+    monkeypatch.setattr(CondaPackageCheck, 'check_package_hashes_and_size', fail)
+    package, errors = verifier.verify_package(path_to_package=package,
+                                              checks_to_ignore=['C1146', 'C1147'],
+                                              hash_threads=hash_threads)
+
+    assert errors == []
+
+
+def test_ignored_checks_are_not_run(package_dir, verifier, monkeypatch):
+    package = os.path.join(package_dir, 'testfile-0.0.19-py36_0.tar.bz2')
+
+    @checks.check('C1135', inputs=(checks.MEMBERS,))
+    def check_for_egg(self):
+        pytest.fail('ignored check was run')
+
+    monkeypatch.setattr(CondaPackageCheck, 'check_for_egg', check_for_egg)
+    package, errors = verifier.verify_package(path_to_package=package,
+                                              checks_to_ignore='C1135')
+
+    assert errors == []
@@ -1,7 +1,13 @@
+import json
 import os
 
+import conda_package_handling.api
 import pytest
 
+from conda_verify import checks, verify
+from conda_verify.archive import uncompressed_size
+from conda_verify.checks import INDEX, CondaPackageCheck, PAYLOAD_CHECKS
+from conda_verify.scratch import ScratchBudget
 from conda_verify.verify import Verify
 
 
@@ -89,3 +95,164 @@ def test_passing_legacy_arguments_to_package_shows_warning(package_dir, verifier
     verifier.verify_package(path_to_package=package, ignore_scripts='abc.py')
     # actually only one more, but we still have the earlier one in the pipe, too.
     assert caplog.text.count('Ignoring legacy ignore_scripts or run_scripts.') == 2
+
+
+def test_valid_package_is_streamed(package_dir):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+
+    package_check = CondaPackageCheck(package)
+    assert package_check.tmpdir is None
+    assert os.path.join('bin', 'testfile') in package_check.archive_members
+
+
+@pytest.fixture
+def conda_package(package_dir, tmpdir):
+    pytest.importorskip('zstandard')
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+    conda_package_handling.api.transmute(package, '.conda', str(tmpdir))
+    return os.path.join(str(tmpdir), 'testfile-0.0.30-py27_0.conda')
+
+
+def test_valid_conda_package(conda_package, verifier):
+    assert CondaPackageCheck(conda_package).tmpdir is None
+    assert verifier.verify_package(path_to_package=conda_package) == (conda_package, [])
+
+
+def test_conda_package_payload_read_on_demand(conda_package):
+    package_check = CondaPackageCheck(conda_package)
+    assert package_check.info['name'] == 'testfile'
+    assert package_check._payload_pending
+
+    assert os.path.join('bin', 'testfile') in package_check.archive_members
+    assert not package_check._payload_pending
+
+
+def test_conda_package_payload_skipped_when_ignored(conda_package, verifier, monkeypatch):
+    def read_payload(package_check):
+        pytest.fail('payload of {} was read'.format(package_check.path))
+
+    monkeypatch.setattr(CondaPackageCheck, '_read_payload', read_payload)
+    ignore = [code for codes in PAYLOAD_CHECKS.values() for code in codes]
+
+    assert verifier.verify_package(path_to_package=conda_package,
+                                   checks_to_ignore=ignore) == (conda_package, [])
+
+
+def test_metadata_only_stops_after_info(package_dir):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+
+    package_check = CondaPackageCheck(package, metadata_only=True)
+    assert package_check.info['name'] == 'testfile'
+    assert all(member.startswith('info') for member in package_check.archive_members)
+
+
+def test_metadata_only_conda_package(conda_package, verifier, monkeypatch):
+    def read_payload(package_check):
+        pytest.fail('payload of {} was read'.format(package_check.path))
+
+    monkeypatch.setattr(CondaPackageCheck, '_read_payload', read_payload)
+
+    assert verifier.verify_package(path_to_package=conda_package,
+                                   metadata_only=True) == (conda_package, [])
+
+
+def test_inputs_are_loaded_on_first_use(package_dir):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+
+    package_check = CondaPackageCheck(package, inputs=[INDEX])
+    assert package_check._payload_pending
+    assert package_check._paths_json is None
+    assert package_check.check_package_name() is None
+
+    assert os.path.join('bin', 'testfile') in package_check.archive_members
+    assert not package_check._payload_pending
+
+
+def test_extracted_inputs_are_loaded_on_first_use(conda_package, tmpdir, monkeypatch):
+    extracted = []
+    extract = conda_package_handling.api.extract
+
+    def extract_components(*args, **kwargs):
+        extracted.append(kwargs.get('components'))
+        return extract(*args, **kwargs)
+
+    monkeypatch.setattr(conda_package_handling.api, 'extract', extract_components)
+    with CondaPackageCheck(conda_package, extract=True, inputs=[INDEX],
+                           scratch_dir=str(tmpdir)) as package_check:
+        assert package_check.check_package_name() is None
+        assert package_check._info_files.keys() == {'index.json'}
+        assert package_check._paths_json is None
+        assert extracted == ['info']
+
+        assert os.path.join('bin', 'testfile') in package_check.archive_members
+        assert extracted == ['info', 'pkg']
+
+
+def scratch_contents(scratch_dir):
+    roots = os.listdir(scratch_dir)
+    assert len(roots) == 1
+    return os.listdir(os.path.join(scratch_dir, roots[0]))
+
+
+def test_extracted_packages_are_cleaned_up(package_dir, verifier, tmpdir, monkeypatch):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+    package_checks = []
+
+    class KeptPackageCheck(CondaPackageCheck):
+        def __init__(self, *args, **kwargs):
+            # keep every package check alive, so cleanup can't rely on finalizers
+            package_checks.append(self)
+            super(KeptPackageCheck, self).__init__(*args, **kwargs)
+
+    monkeypatch.setattr(checks, 'can_stream', lambda path: False)
+    monkeypatch.setattr(verify, 'CondaPackageCheck', KeptPackageCheck)
+    for _ in range(1000):
+        assert verifier.verify_package(path_to_package=package,
+                                       scratch_dir=str(tmpdir)) == (package, [])
+
+    assert len(package_checks) == 1000
+    assert scratch_contents(str(tmpdir)) == []
+
+
+def test_extracted_package_cleaned_up_on_error(package_dir, tmpdir):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+    scratch_dir = str(tmpdir)
+
+    with pytest.raises(RuntimeError):
+        with CondaPackageCheck(package, extract=True, scratch_dir=scratch_dir) as package_check:
+            assert scratch_contents(scratch_dir) == [os.path.basename(package_check.tmpdir)]
+            raise RuntimeError
+
+    assert scratch_contents(scratch_dir) == []
+
+    def on_metadata(package_check):
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        CondaPackageCheck(package, extract=True, scratch_dir=scratch_dir,
+                          on_metadata=on_metadata)
+    assert scratch_contents(scratch_dir) == []
+
+
+def test_extracted_package_reserves_scratch_budget(package_dir, tmpdir):
+    package = os.path.join(package_dir, 'testfile-0.0.30-py27_0.tar.bz2')
+    budget = ScratchBudget(1 << 20)
+
+    with CondaPackageCheck(package, extract=True, scratch_dir=str(tmpdir),
+                           scratch_budget=budget):
+        assert budget._used[0] == uncompressed_size(package) > 0
+    assert budget._used[0] == 0
+
+
+def test_uncompressed_size_from_paths_json(tmpdir, write_package):
+    index = {'name': 'testfile', 'version': '0.0.1', 'build': '0'}
+    paths = {'paths': [{'_path': 'lib/libz.so', 'size_in_bytes': 1 << 20}], 'paths_version': 1}
+    members = [('info/paths.json', json.dumps(paths).encode()), ('lib/libz.so', b'z' * (1 << 20))]
+    package = write_package(tmpdir, index, members, 'testfile-0.0.1-0.tar')
+    info_size = len(json.dumps(index)) + len(json.dumps(paths))
+    assert uncompressed_size(package) == info_size + (1 << 20)
+
+    # the payload isn't read once info/paths.json has been
+    with open(package, 'r+b') as f:
+        f.truncate(4 << 10)
+    assert uncompressed_size(package) == info_size + (1 << 20)
@@ -0,0 +1,89 @@
+import os
+
+import conda_package_handling.api
+import pytest
+from concurrent.futures import Future
+
+from conda_verify.admission import AdmissionController, Footprint, estimate_footprint
+
+
+class RecordingExecutor(object):
+    """Complete tasks right away, recording the tasks in flight at each submit."""
+
+    def __init__(self):
+        self.controller = None
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append((fn, len(self.controller._in_flight)))
+        future = Future()
+        future.set_result(fn)
+        return future
+
+
+def run(footprints, max_workers=4, max_memory=None, max_disk=None):
+    executor = RecordingExecutor()
+    controller = AdmissionController(executor, max_workers, max_memory, max_disk)
+    executor.controller = controller
+    for name, footprint in footprints:
+        controller.add(footprint, name)
+    assert len(controller) == len(footprints)
+    completed = [future.result() for future in controller.as_completed()]
+    assert sorted(completed) == sorted(name for name, _ in footprints)
+    return executor.submitted
+
+
+def test_admission_without_limits():
+    footprints = [(name, Footprint(1 << 40, 1 << 40)) for name in 'abcde']
+    assert run(footprints, max_workers=1) == [(name, i) for i, name in enumerate('abcde')]
+
+
+def test_admission_passes_over_tasks_that_do_not_fit():
+    footprints = [('large', Footprint(60, 0)), ('huge', Footprint(500, 0)),
+                  ('small1', Footprint(30, 0)), ('small2', Footprint(30, 0))]
+    # large and small1 fit together, huge runs on its own, then small2
+    assert run(footprints, max_memory=100) == [
+        ('large', 0), ('small1', 1), ('huge', 0), ('small2', 0)]
+
+
+def test_admission_disk_limit():
+    footprints = [('a', Footprint(0, 60)), ('b', Footprint(0, 60)), ('c', Footprint(0, 10))]
+    assert run(footprints, max_disk=100) == [('a', 0), ('c', 1), ('b', 0)]
+
+
+def test_admission_worker_limit():
+    footprints = [(name, Footprint(1, 1)) for name in 'abc']
+    assert run(footprints, max_workers=2, max_memory=100) == [('a', 0), ('b', 1), ('c', 0)]
+
+
+def test_admission_cancel():
+    executor = RecordingExecutor()
+    controller = AdmissionController(executor, 1, max_memory=10)
+    executor.controller = controller
+    for name in 'ab':
+        controller.add(Footprint(10, 0), name)
+    completed = controller.as_completed()
+    assert next(completed).result() == 'a'
+    controller.cancel()
+    assert list(completed) == []
+    assert [name for name, _ in executor.submitted] == ['a']
+
+
+def test_estimate_footprint(tmpdir):
+    package = tmpdir.join('testfile-0.0.1-py36_0.tar.bz2')
+    package.write(b'x' * (1 << 20), mode='wb')
+    footprint = estimate_footprint(str(package))
+    assert footprint.disk == 0
+    assert footprint.memory > estimate_footprint(str(package), metadata_only=True).memory
+
+
+def test_estimate_footprint_from_archive_size(tmpdir):
+    pytest.importorskip('zstandard')
+    package = os.path.join(os.path.dirname(__file__), 'test_packages',
+                           'testfile-0.0.30-py27_0.tar.bz2')
+    conda_package_handling.api.transmute(package, '.conda', str(tmpdir))
+    package = str(tmpdir.join('testfile-0.0.30-py27_0.conda'))
+    # the package isn't opened, so its contents don't matter
+    junk = tmpdir.join('testfile-0.0.31-py27_0.conda')
+    junk.write(b'x' * os.path.getsize(package), mode='wb')
+    assert estimate_footprint(package) == estimate_footprint(str(junk))
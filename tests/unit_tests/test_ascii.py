@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from conda_verify.utilities import all_ascii, first_non_ascii
+
+
+def reference_first_non_ascii(data, allow_CR=False):
+    """The byte at a time loop all_ascii used to be."""
+    newline = [10, 13] if allow_CR else [10]
+    for offset, n in enumerate(bytearray(data)):
+        if not (n in newline or 32 <= n < 127):
+            return offset
+    return None
+
+
+@pytest.mark.parametrize('allow_CR', [False, True])
+def test_every_byte(allow_CR):
+    for n in range(256):
+        data = b'abc' + bytes(bytearray([n])) + b'\x00'
+        expected = reference_first_non_ascii(data, allow_CR)
+        assert first_non_ascii(data, allow_CR) == expected
+        assert all_ascii(data, allow_CR) == (expected is None)
+
+
+def test_first_non_ascii():
+    assert first_non_ascii(b'') is None
+    assert first_non_ascii(b'info/files\nbin/run\n') is None
+    assert first_non_ascii(b'a\r\nb') == 1
+    assert first_non_ascii(b'a\r\nb', allow_CR=True) is None
+    assert first_non_ascii(u'caf\xe9\t'.encode('utf-8')) == 3
+    assert first_non_ascii(b'tab\there') == 3
+
+
+def test_random_data():
+    data = os.urandom(1 << 16)
+    for start in range(0, len(data), 997):
+        chunk = bytes(bytearray(n % 128 for n in bytearray(data[start:start + 997])))
+        for allow_CR in (False, True):
+            assert (first_non_ascii(chunk, allow_CR)
+                    == reference_first_non_ascii(chunk, allow_CR))
+
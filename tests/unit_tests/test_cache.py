@@ -0,0 +1,53 @@
+import os
+
+from conda_verify.cache import ResultCache
+
+
+INDEX = {'name': 'testfile', 'version': '0.0.1', 'build': '0'}
+
+
+def test_cache_get_and_put(tmpdir, write_package):
+    cache = ResultCache(str(tmpdir.join('cache')))
+    key = cache.key(write_package(tmpdir, INDEX, []))
+    assert cache.get(key) is None
+    cache.put(key, ['[C1101] Found 1 error'])
+    assert cache.get(key) == ['[C1101] Found 1 error']
+    assert cache.counters() == {'hits': 1, 'misses': 1}
+    cache.close()
+
+
+def test_cache_persists(tmpdir, write_package):
+    cache_dir = str(tmpdir.join('cache'))
+    cache = ResultCache(cache_dir)
+    key = cache.key(write_package(tmpdir, INDEX, []))
+    cache.put(key, [])
+    cache.close()
+
+    cache = ResultCache(cache_dir)
+    assert cache.get(key) == []
+    cache.close()
+    assert os.path.isfile(os.path.join(cache_dir, 'results.sqlite'))
+
+
+def test_cache_key(tmpdir, write_package):
+    package = write_package(tmpdir, INDEX, [])
+    key = ResultCache.key(package)
+    assert key == ResultCache.key(write_package(tmpdir, INDEX, [], 'copy.tar.bz2'))
+    assert key != ResultCache.key(write_package(tmpdir, dict(INDEX, build='1'), []))
+    assert key != ResultCache.key(package, metadata_only=True)
+    assert key != ResultCache.key(package, checks_to_ignore=['C1101'])
+    assert (ResultCache.key(package, checks_to_ignore=['C1101', 'C1102'])
+            == ResultCache.key(package, checks_to_ignore=['C1102', 'C1101']))
+
+
+def test_cache_evicts_least_recently_used(tmpdir, write_package):
+    cache = ResultCache(str(tmpdir.join('cache')), max_entries=2)
+    keys = [cache.key(write_package(tmpdir, dict(INDEX, build=str(i)), [])) for i in range(3)]
+    cache.put(keys[0], [])
+    cache.put(keys[1], [])
+    cache.get(keys[0])
+    cache.put(keys[2], [])
+    assert cache.get(keys[0]) == []
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == []
+    cache.close()
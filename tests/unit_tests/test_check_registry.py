@@ -0,0 +1,68 @@
+import pytest
+
+from conda_verify.checks import (
+    ALL_INPUTS,
+    CondaPackageCheck,
+    CondaRecipeCheck,
+    HASHES,
+    INDEX,
+    MEMBERS,
+    METADATA_CHECKS,
+    PATHS_JSON,
+    PAYLOAD_CHECKS,
+    PAYLOAD_INPUTS,
+    registered_checks,
+    required_inputs,
+)
+
+
+@pytest.mark.parametrize('cls', [CondaPackageCheck, CondaRecipeCheck])
+def test_every_check_is_registered(cls):
+    checks = [name for name in dir(cls) if name.startswith('check_')]
+    assert sorted(registered_checks(cls)) == sorted(checks)
+    for name in checks:
+        assert getattr(cls, name).codes
+
+
+def test_check_codes_are_unique():
+    codes = [code for cls in (CondaPackageCheck, CondaRecipeCheck)
+             for name in registered_checks(cls) for code in getattr(cls, name).codes]
+    assert len(codes) == len(set(codes))
+
+
+def test_registered_checks_are_in_definition_order():
+    checks = registered_checks(CondaPackageCheck)
+    assert checks[0] == 'check_package_name'
+    assert checks[-1] == 'check_noarch_files'
+
+
+def test_registered_checks_skip_ignored_codes():
+    checks = registered_checks(CondaPackageCheck, ['C1146'])
+    assert 'check_package_hashes_and_size' in checks
+    checks = registered_checks(CondaPackageCheck, 'C1146,C1147')
+    assert 'check_package_hashes_and_size' not in checks
+    checks = registered_checks(CondaPackageCheck, {'C1101', 'C1102', 'C1103'})
+    assert 'check_package_name' not in checks
+
+
+def test_metadata_and_payload_checks():
+    assert METADATA_CHECKS == tuple(registered_checks(CondaPackageCheck, metadata_only=True))
+    assert 'check_package_name' in METADATA_CHECKS
+    assert 'check_package_hashes_and_size' not in METADATA_CHECKS
+    assert PAYLOAD_CHECKS['check_package_hashes_and_size'] == ('C1146', 'C1147')
+    assert 'check_package_name' not in PAYLOAD_CHECKS
+
+
+def test_package_checks_declare_inputs():
+    for name in registered_checks(CondaPackageCheck):
+        method = getattr(CondaPackageCheck, name)
+        assert method.inputs and method.inputs <= ALL_INPUTS
+        assert method.payload == bool(method.inputs & PAYLOAD_INPUTS)
+
+
+def test_required_inputs():
+    assert required_inputs(CondaPackageCheck, registered_checks(CondaPackageCheck)) == ALL_INPUTS
+    assert required_inputs(CondaPackageCheck, ['check_package_name']) == {INDEX}
+    assert required_inputs(CondaPackageCheck, ['check_package_name',
+                                               'check_package_hashes_and_size']) == \
+        {INDEX, PATHS_JSON, MEMBERS, HASHES}
@@ -0,0 +1,42 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from conda_verify import checks
+
+
+@pytest.mark.parametrize('size', [0, 1, 4095, 4096, 65537, checks._MMAP_SIZE,
+                                  checks._MMAP_SIZE + 1])
+def test_sha256_checksum(tmpdir, size):
+    data = os.urandom(size)
+    path = os.path.join(str(tmpdir), 'testfile.so')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    with open(path, 'rb') as f:
+        assert checks.sha256_checksum(f) == hashlib.sha256(data).hexdigest()
+
+
+def test_sha256_checksum_rest_of_file(tmpdir):
+    data = os.urandom(checks._MMAP_SIZE + 1)
+    path = os.path.join(str(tmpdir), 'testfile.so')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    with open(path, 'rb') as f:
+        f.seek(10)
+        assert checks.sha256_checksum(f) == hashlib.sha256(data[10:]).hexdigest()
+
+
+def test_sha256_checksum_file_object():
+    data = os.urandom(100000)
+
+    assert checks.sha256_checksum(io.BytesIO(data)) == hashlib.sha256(data).hexdigest()
+
+
+def test_block_size():
+    assert checks._block_size(0) == checks._MIN_BLOCK_SIZE
+    assert checks._block_size(50000) == 50001
+    assert checks._block_size(1 << 30) == checks._MAX_BLOCK_SIZE
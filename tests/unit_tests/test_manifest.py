@@ -0,0 +1,56 @@
+import json
+import os
+
+from conda_verify.manifest import Manifest, stat_signature
+
+
+INDEX = {'name': 'testfile', 'version': '0.0.1', 'build': '0'}
+
+
+def test_manifest_round_trip(tmpdir, write_package):
+    package = write_package(tmpdir, INDEX, [])
+    path = str(tmpdir.join('manifest.json'))
+    manifest = Manifest(path)
+    assert manifest.findings(package, stat_signature(package)) is None
+    manifest.record(package, stat_signature(package), ['[C1101] Found 1 error'])
+    manifest.save()
+
+    manifest = Manifest(path)
+    assert manifest.findings(package, stat_signature(package)) == ['[C1101] Found 1 error']
+    assert sorted(os.listdir(str(tmpdir))) == ['manifest.json', 'testfile-0.0.1-0.tar.bz2']
+
+
+def test_manifest_changed_signature(tmpdir, write_package):
+    package = write_package(tmpdir, INDEX, [])
+    manifest = Manifest(str(tmpdir.join('manifest.json')))
+    manifest.record(package, stat_signature(package), [])
+    assert manifest.findings(package, stat_signature(package)) == []
+    write_package(tmpdir, INDEX, [('info/files', b'changed')])
+    assert manifest.findings(package, stat_signature(package)) is None
+
+
+def test_manifest_ignored_for_other_checks(tmpdir, write_package):
+    package = write_package(tmpdir, INDEX, [])
+    path = str(tmpdir.join('manifest.json'))
+    manifest = Manifest(path)
+    manifest.record(package, stat_signature(package), [])
+    manifest.save()
+    assert Manifest(path, metadata_only=True).findings(package, stat_signature(package)) is None
+    assert Manifest(path, checks_to_ignore=['C1101']).packages == {}
+
+
+def test_manifest_drops_missing_packages(tmpdir, write_package):
+    package = write_package(tmpdir, INDEX, [])
+    path = str(tmpdir.join('manifest.json'))
+    manifest = Manifest(path)
+    manifest.record(package, stat_signature(package), [])
+    os.unlink(package)
+    manifest.save()
+    with open(path) as manifest_file:
+        assert json.load(manifest_file)['packages'] == {}
+
+
+def test_manifest_unreadable(tmpdir):
+    path = tmpdir.join('manifest.json')
+    path.write('not json')
+    assert Manifest(str(path)).packages == {}
@@ -0,0 +1,121 @@
+import io
+import struct
+
+import pytest
+
+from conda_verify.utilities import architectures, get_object_type, read_object_type
+
+
+def pe_file(machine, pe_offset=0x80, size=8192):
+    """Return the start of a DLL with its PE header at pe_offset."""
+    data = bytearray(size)
+    data[:4] = b'MZ\x90\x00'
+    struct.pack_into('<I', data, 0x3C, pe_offset)
+    struct.pack_into('<4sH', data, pe_offset, b'PE\0\0', machine)
+    return bytes(data)
+
+
+class Stream(io.RawIOBase):
+    """A stream that can't seek, and records how much of it was read."""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+        self.read_size = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self.data.read(size)
+        self.read_size += len(data)
+        return data
+
+
+@pytest.mark.parametrize('machine, object_type', [(0x8664, 'DLL AMD64'), (0x14C, 'DLL I386'),
+                                                  (0x0, 'DLL UNKNOWN'), (0x1234, 'DLL UNKNOWN')])
+def test_pe_machine(machine, object_type):
+    assert get_object_type(pe_file(machine)) == object_type
+
+
+def test_pe_header_is_read_from_e_lfanew():
+    data = bytearray(pe_file(0x8664, pe_offset=0x100))
+    # a PE signature in the DOS stub, before the PE header
+    struct.pack_into('<4sH', data, 0x40, b'PE\0\0', 0x14C)
+    stream = Stream(bytes(data))
+
+    assert read_object_type(stream) == 'DLL AMD64'
+    assert stream.read_size == 0x100 + 6
+
+
+@pytest.mark.parametrize('data', [
+    pe_file(0x8664)[:0x80],
+    pe_file(0x8664)[:0x84],
+    pe_file(0x8664)[:0x30],
+    pe_file(0x8664, pe_offset=4096, size=8192),
+    pe_file(0x8664).replace(b'PE\0\0', b'PF\0\0'),
+])
+def test_no_pe_header(data):
+    assert get_object_type(data) == '<no PE header found>'
+
+
+def test_pe_header_overlapping_dos_header():
+    assert get_object_type(pe_file(0x14C, pe_offset=0x30, size=64)) == 'DLL I386'
+
+
+def elf_file(bits, byte_order, machine):
+    """Return the start of an ELF file."""
+    data = bytearray(64)
+    data[:4] = b'\x7fELF'
+    data[4:6] = bytearray([{32: 1, 64: 2}[bits], {'<': 1, '>': 2}[byte_order]])
+    struct.pack_into(byte_order + 'H', data, 18, machine)
+    return bytes(data)
+
+
+@pytest.mark.parametrize('data, object_type', [
+    (elf_file(64, '<', 0x3E), 'ELF64 X86_64'),
+    (elf_file(32, '<', 0x3), 'ELF32 386'),
+    (elf_file(64, '<', 0xB7), 'ELF64 AARCH64'),
+    (elf_file(64, '<', 0x15), 'ELF64 PPC64'),
+    (elf_file(64, '>', 0x16), 'ELF64 S390'),
+    (elf_file(64, '<', 0x1234), 'ELF64 UNKNOWN'),
+    (elf_file(64, '<', 0x3E)[:19], '<no ELF header found>'),
+    (b'\x7fELF' + bytes(bytearray(60)), '<no ELF header found>'),
+])
+def test_elf_machine(data, object_type):
+    assert get_object_type(data) == object_type
+
+
+@pytest.mark.parametrize('data, object_type', [
+    (b'\xcf\xfa\xed\xfe' + struct.pack('<I', 0x1000007), 'MachO-x86_64'),
+    (b'\xcf\xfa\xed\xfe' + struct.pack('<I', 0x100000C), 'MachO-arm64'),
+    (b'\xce\xfa\xed\xfe' + struct.pack('<I', 0x7), 'MachO-i386'),
+    (b'\xfe\xed\xfa\xce' + struct.pack('>I', 0x12), 'MachO-ppc'),
+    (b'\xcf\xfa\xed\xfe' + struct.pack('<I', 0x99), 'MachO-UNKNOWN'),
+    (b'\xcf\xfa\xed\xfe', '<no Mach-O header found>'),
+    (b'\xca\xfe\xba\xbe' + struct.pack('>I', 2) + struct.pack('>I16x', 0x1000007)
+     + struct.pack('>I16x', 0x100000C), 'MachO-universal x86_64,arm64'),
+    (b'\xca\xfe\xba\xbe' + struct.pack('>I', 2) + struct.pack('>I16x', 0x1000007),
+     '<no Mach-O header found>'),
+    # a Java class file
+    (b'\xca\xfe\xba\xbe' + struct.pack('>HH', 0, 52), None),
+])
+def test_macho_cputype(data, object_type):
+    assert get_object_type(data) == object_type
+
+
+def test_universal_header_is_read_from_stream():
+    data = (b'\xca\xfe\xba\xbe' + struct.pack('>I', 4)
+            + struct.pack('>I16x', 0x1000007) * 4 + bytes(bytearray(4096)))
+    stream = Stream(data)
+    assert read_object_type(stream) == 'MachO-universal ' + ','.join(['x86_64'] * 4)
+    assert stream.read_size == 8 + 4 * 20
+
+
+def test_architectures():
+    assert architectures('MachO-universal x86_64,arm64') == ['MachO-x86_64', 'MachO-arm64']
+    assert architectures('ELF64 X86_64') == ['ELF64 X86_64']
+
+
+def test_other_object_types():
+    assert get_object_type(b'') is None
+    assert get_object_type(b'#!/bin/sh\n') is None
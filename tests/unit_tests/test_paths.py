@@ -0,0 +1,143 @@
+import itertools
+import os
+import random
+
+from conda_verify.paths import (
+    LINK_SCRIPTS,
+    SCANNED_CODES,
+    PathIndex,
+    extension,
+    may_be_binary,
+    scan_paths,
+    sorted_difference,
+)
+
+
+# the conditions the checks applied to each path before paths were scanned
+REFERENCE = {
+    'C1125': lambda path: (path in {'conda-meta', 'conda-bld', 'pkgs', 'pkgs32', 'envs'}
+                           or path.endswith(('.DS_Store', '~'))),
+    'C1126': lambda path: path in (os.path.join('info', 'package_metadata.json'),
+                                   os.path.join('info', 'link.json')),
+    'C1134': lambda path: path.endswith(LINK_SCRIPTS),
+    'C1135': lambda path: path.endswith('.egg'),
+    'C1136': lambda path: path.startswith((os.path.join('bin', 'easy_install'),
+                                           os.path.join('Scripts', 'easy_install'))),
+    'C1137': lambda path: path.endswith('.pth'),
+    'C1138': lambda path: path.endswith('.pyo'),
+    'C1139': lambda path: (path.endswith('.pyc') and 'site-packages' not in path
+                           and 'distutils' not in path),
+    'C1140': lambda path: 'lib2to3' in path and path.endswith('.pickle'),
+    'C1148': lambda path: path.endswith(('.so', '.dylib', '.dll', 'lib')),
+}
+
+
+def test_extension():
+    assert extension(os.path.join('lib', 'a.tar.gz')) == 'gz'
+    assert extension(os.path.join('bin', '.bat')) == 'bat'
+    assert extension(os.path.join('a.b', 'README')) == ''
+    assert extension('README') == ''
+
+
+def test_may_be_binary():
+    for path in ['bin/python3.8', 'sbin/tool', 'libexec/git-core/git', 'lib/libz.so',
+                 'lib/libz.so.1.2.11', 'lib/libz.1.dylib', 'Library/bin/zlib.dll',
+                 'Scripts/pip.exe', 'lib/python3.8/site-packages/_ssl.cpython-38-darwin.so']:
+        assert may_be_binary(path.replace('/', os.path.sep))
+    for path in ['bin', 'lib/libz.a', 'lib/python3.8/os.py', 'share/bin/tool', 'include/zlib.h',
+                 'Library/bin/zlib.lib', 'lib/libz.sox']:
+        assert not may_be_binary(path.replace('/', os.path.sep))
+
+
+def test_path_index():
+    paths = [os.path.join('bin', 'a.exe'), os.path.join('Menu', 'a.json'), 'README',
+             os.path.join('lib', 'a.dll'), os.path.join('bin', 'a.bat'), os.path.join('lib', 'b.exe')]
+    index = PathIndex(paths)
+
+    assert list(index) == paths
+    assert len(index) == 6
+    assert os.path.join('lib', 'a.dll') in index
+    assert 'lib' not in index
+    assert index.with_extension('exe', 'dll') == [paths[0], paths[3], paths[5]]
+    assert index.with_extension('so') == []
+    assert index.in_directory('bin') == [paths[0], paths[4]]
+    assert index.with_prefix(os.path.join('lib', 'a'), 'R') == [paths[2], paths[3]]
+    assert list(index.sorted()) == sorted(paths)
+
+
+def test_path_index_first_non_ascii():
+    paths = ['', os.path.join('lib', 'a.py'), os.path.join('lib', u'caf\xe9.py'),
+             os.path.join('bin', 'tab\trun'), os.path.join('lib', 'b\nc.py')]
+    assert PathIndex(paths).first_non_ascii() == paths[2]
+    assert PathIndex(paths[3:] + paths[:3]).first_non_ascii() == paths[3]
+    assert PathIndex(paths[:2] + paths[4:]).first_non_ascii() is None
+    assert PathIndex([]).first_non_ascii() is None
+
+
+def test_path_index_normalizes_paths():
+    index = PathIndex(['./lib/a.py', 'lib//b.py'], normalize=True)
+    assert list(index) == [os.path.join('lib', 'a.py'), os.path.join('lib', 'b.py')]
+    assert os.path.join('lib', 'a.py') in index
+
+
+def test_path_index_matches_set():
+    shuffled = random.Random(0)
+    names = ['a', 'ab', 'b', 'a.py', 'b.pyc', 'c']
+    paths = [os.path.join(*parts) for parts in itertools.product(names, names)]
+    shuffled.shuffle(paths)
+    index = PathIndex(paths[:20])
+
+    assert list(index) == paths[:20]
+    for path in paths + ['', 'a', 'zz']:
+        assert (path in index) == (path in paths[:20])
+
+
+def test_sorted_difference():
+    assert list(sorted_difference(['a', 'b', 'b', 'd'], ['b', 'c', 'd', 'e', 'e'])) == \
+        [('a', True), ('c', False), ('e', False)]
+    assert list(sorted_difference([], ['a'])) == [('a', False)]
+    assert list(sorted_difference(['a'], ['a'])) == []
+
+
+def reference_scan(paths):
+    found = {}
+    for code, condition in REFERENCE.items():
+        for path in paths:
+            if condition(path):
+                found[code] = path
+                break
+    return found
+
+
+def test_reference_covers_scanned_codes():
+    assert set(REFERENCE) == SCANNED_CODES
+
+
+def test_scan_paths_finds_first_path_per_code():
+    paths = ['lib/a.py', 'lib/b.egg', 'lib/c.egg', 'bin/easy_install-3.6',
+             'lib/python2.7/lib2to3/Grammar.pickle', 'info/link.json', 'lib/libz.so']
+    assert scan_paths(paths) == {
+        'C1135': 'lib/b.egg',
+        'C1136': 'bin/easy_install-3.6',
+        'C1140': 'lib/python2.7/lib2to3/Grammar.pickle',
+        'C1126': 'info/link.json',
+        'C1148': 'lib/libz.so',
+    }
+    assert scan_paths([]) == {}
+
+
+def test_scan_paths_matches_reference():
+    directories = ['', 'bin', 'Scripts', 'lib', 'lib/python3.6/site-packages',
+                   'lib/python2.7/lib2to3', 'lib/python2.7/distutils', 'info', 'a.b']
+    names = ['conda-meta', 'pkgs', 'envs', '.DS_Store', 'x.DS_Store', 'notes~', 'x.egg',
+             'x.pth', 'x.pyo', 'x.pyc', 'Grammar.pickle', 'libz.so', 'libz.dylib',
+             'x.dll', 'x.lib', 'zlib', 'link.json', 'package_metadata.json',
+             'easy_install', 'easy_install-script.py', 'foo-post-link.sh', 'foo-pre-link.bat',
+             'foo-pre-unlink.sh', 'post-link.sh', 'run.sh', 'x.py', 'README', 'x.tar.gz']
+    paths = [os.path.join(directory, name)
+             for directory, name in itertools.product(directories, names)]
+    shuffled = random.Random(0)
+    for _ in range(20):
+        shuffled.shuffle(paths)
+        sample = paths[:shuffled.randint(0, len(paths))]
+        assert scan_paths(sample) == reference_scan(sample)
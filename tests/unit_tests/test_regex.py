@@ -1,4 +1,7 @@
+import itertools
 import os
+import random
+import timeit
 
 import pytest
 
@@ -51,3 +54,43 @@ def test_ver_spec_pat(package_dir, recipe_dir):
     assert utilities.fullmatch(recipe_ver_spec_pat, or_version)
     assert utilities.fullmatch(recipe_ver_spec_pat, regex_version)
     assert utilities.fullmatch(recipe_ver_spec_pat, python_version)
+
+
+# the version spec pattern before it was rewritten to match in linear time
+BACKTRACKING_VER_SPEC_PAT = r"^(?:[><=]{0,2}(?:(?:[\d\*]+[!\._]?){1,})[+\w\*]*[|,]?){1,}"
+SPEC_CHARACTERS = u'1*!._a+>=<|,@ \u0663\xe9'
+
+
+def test_valid_ver_spec_matches_backtracking_pattern():
+    specs = [u''.join(characters) for length in range(5)
+             for characters in itertools.product(SPEC_CHARACTERS, repeat=length)]
+    shuffled = random.Random(0)
+    specs.extend(u''.join(shuffled.choice(SPEC_CHARACTERS) for _ in range(shuffled.randint(5, 10)))
+                 for _ in range(20000))
+    for spec in specs:
+        expected = utilities.fullmatch(BACKTRACKING_VER_SPEC_PAT, spec) is not None
+        assert checks.valid_ver_spec(spec) == expected, spec
+        assert (utilities.fullmatch(checks.ver_spec_pat, spec) is not None) == expected, spec
+
+
+def best_time(spec):
+    return min(timeit.repeat(lambda: checks.valid_ver_spec(spec), number=20, repeat=5))
+
+
+@pytest.mark.parametrize('unit, end', [('1', '@'), ('1.', '!'), ('>=1.0a', '@'), ('1_', '.'),
+                                       ('1*', ',,')])
+def test_valid_ver_spec_takes_linear_time(unit, end):
+    assert not checks.valid_ver_spec(unit * 8000 + end)
+    # 16 times the input takes about 16 times as long, where backtracking
+    # would take at least 256 times as long
+    assert best_time(unit * 8000 + end) < 64 * best_time(unit * 500 + end)
+
+
+def test_split_dependency():
+    checks.split_dependency.cache_clear()
+    assert checks.split_dependency('python >=3.8,<3.9.0a0') == (('python', '>=3.8,<3.9.0a0'), True)
+    assert checks.split_dependency('python >=3.8,<3.9.0a0') == (('python', '>=3.8,<3.9.0a0'), True)
+    assert checks.split_dependency('python 3.6@**&*&(&@!') == (('python', '3.6@**&*&(&@!'), False)
+    assert checks.split_dependency('python') == (('python',), True)
+    assert checks.split_dependency('') == ((), True)
+    assert checks.dependency_cache_counters() == {'hits': 1, 'misses': 4}
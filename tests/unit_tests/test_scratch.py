@@ -0,0 +1,68 @@
+import os
+import threading
+
+import pytest
+
+from conda_verify.scratch import ScratchBudget, ScratchDirectory
+from conda_verify.utilities import parse_size
+
+
+def test_scratch_budget_waits_for_release():
+    budget = ScratchBudget(100)
+    budget.reserve(60)
+    reserved = threading.Event()
+
+    def reserve():
+        budget.reserve(60)
+        reserved.set()
+
+    thread = threading.Thread(target=reserve)
+    thread.start()
+    assert not reserved.wait(0.1)
+    budget.release(60)
+    assert reserved.wait(5)
+    thread.join()
+
+
+def test_scratch_budget_larger_than_budget():
+    budget = ScratchBudget(100)
+    budget.reserve(1000)
+    assert budget._used[0] == 1000
+    budget.release(1000)
+    assert budget._used[0] == 0
+
+
+def test_scratch_directories_share_a_root(tmpdir):
+    budget = ScratchBudget(100)
+    first = ScratchDirectory(str(tmpdir), budget)
+    second = ScratchDirectory(str(tmpdir), budget)
+    assert os.path.dirname(first.name) == os.path.dirname(second.name)
+    assert os.path.dirname(os.path.dirname(first.name)) == str(tmpdir)
+
+    first.reserve(10)
+    os.mkdir(os.path.join(first.name, 'bin'))
+    with open(os.path.join(first.name, 'bin', 'readonly'), 'w') as f:
+        f.write('readonly')
+    os.chmod(os.path.join(first.name, 'bin', 'readonly'), 0o444)
+    os.chmod(os.path.join(first.name, 'bin'), 0o555)
+    first.cleanup()
+    second.cleanup()
+    assert not os.path.exists(first.name)
+    assert os.listdir(os.path.dirname(first.name)) == []
+    assert budget._used[0] == 0
+
+
+@pytest.mark.parametrize('size, expected', [
+    ('1024', 1024),
+    ('512K', 512 << 10),
+    ('1.5g', 3 << 29),
+    ('2TB', 2 << 40),
+])
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+@pytest.mark.parametrize('size', ['', 'G', '-1', 'ten', 'inf', '-inf', 'nan', '1e308T'])
+def test_parse_size_invalid(size):
+    with pytest.raises(ValueError):
+        parse_size(size)